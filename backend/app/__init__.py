@@ -23,7 +23,7 @@ def create_app(config_class=Config):
     CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
     
     # Register blueprints
-    from app.routes import auth, articles, users, categories, tags, summary, bookmarks
+    from app.routes import auth, articles, users, categories, tags, summary, bookmarks, search
     
     app.register_blueprint(auth.bp, url_prefix='/api/auth')
     app.register_blueprint(articles.bp, url_prefix='/api/articles')
@@ -32,6 +32,7 @@ def create_app(config_class=Config):
     app.register_blueprint(tags.bp, url_prefix='/api/tags')
     app.register_blueprint(summary.bp, url_prefix='/api')
     app.register_blueprint(bookmarks.bp, url_prefix='/api/bookmarks')
+    app.register_blueprint(search.bp, url_prefix='/api/search')
     
     # Health check endpoint
     @app.route('/api/health')
@@ -4,5 +4,10 @@ from app.models.category import Category
 from app.models.tag import Tag
 from app.models.bookmark import Bookmark
 from app.models.admin_log import AdminLog
+from app.models.collection_version import CollectionVersion
+from app.models.article_lsh_bucket import ArticleLshBucket
+from app.models.article_view import ArticleView
+from app.models.summary_cache import SummaryCacheEntry
+from app.models.summary_job import SummaryJob
 
-__all__ = ['User', 'Article', 'Category', 'Tag', 'Bookmark', 'AdminLog']
+__all__ = ['User', 'Article', 'Category', 'Tag', 'Bookmark', 'AdminLog', 'CollectionVersion', 'ArticleLshBucket', 'ArticleView', 'SummaryCacheEntry', 'SummaryJob']
@@ -16,6 +16,7 @@ class Article(db.Model):
     published_date = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    minhash = db.deferred(db.Column(db.LargeBinary, nullable=True))  # MinHash signature for near-duplicate detection
     
     # Relationships
     tags = db.relationship('Tag', secondary=article_tags, lazy='subquery',
@@ -23,8 +24,8 @@ class Article(db.Model):
     bookmarks = db.relationship('Bookmark', backref='article', lazy=True, cascade='all, delete-orphan')
     admin_logs = db.relationship('AdminLog', backref='article', lazy=True)
     
-    def to_dict(self, include_content=True, user_id=None):
-        """Convert to dictionary"""
+    def to_dict(self, include_content=True, user_id=None, bookmarked=None):
+        """Convert to dictionary (pass `bookmarked` when the status is already known)"""
         from app.models.bookmark import Bookmark
         
         result = {
@@ -45,8 +46,23 @@ class Article(db.Model):
             result['content'] = self.content
         
         # Check if bookmarked by user
-        if user_id:
+        if bookmarked is not None:
+            result['is_bookmarked'] = bookmarked
+        elif user_id:
             bookmark = Bookmark.query.filter_by(user_id=user_id, article_id=self.id).first()
             result['is_bookmarked'] = bookmark is not None
         
         return result
+    
+    @staticmethod
+    def bookmarked_ids(user_id, article_ids):
+        """Return the subset of article_ids bookmarked by the user (single query)"""
+        from app.models.bookmark import Bookmark
+        
+        if not user_id or not article_ids:
+            return set()
+        
+        rows = db.session.query(Bookmark.article_id) \
+            .filter(Bookmark.user_id == user_id, Bookmark.article_id.in_(article_ids)) \
+            .all()
+        return {article_id for (article_id,) in rows}
@@ -0,0 +1,11 @@
+from app import db
+
+
+class ArticleLshBucket(db.Model):
+    """LSH band bucket of an article's MinHash signature, used to find near-duplicates"""
+    __tablename__ = 'article_lsh_buckets'
+    
+    band = db.Column(db.SmallInteger, primary_key=True)
+    bucket = db.Column(db.BigInteger, primary_key=True)
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'),
+                           primary_key=True, index=True)
@@ -0,0 +1,10 @@
+from app import db
+
+
+class ArticleView(db.Model):
+    """Hourly rollup of article views, written in batches by the view counters"""
+    __tablename__ = 'article_views'
+    
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True, index=True)  # start of the hour (UTC)
+    views = db.Column(db.Integer, default=0, nullable=False)
@@ -17,6 +17,6 @@ class Bookmark(db.Model):
         """Convert to dictionary"""
         return {
             'id': self.id,
-            'article': self.article.to_dict(include_content=False),
+            'article': self.article.to_dict(include_content=False, bookmarked=True),
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
@@ -8,6 +8,7 @@ class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     slug = db.Column(db.String(100), nullable=False, unique=True, index=True)
+    article_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # maintained by article writes
     
     # Relationships
     articles = db.relationship('Article', backref='category', lazy=True)
@@ -0,0 +1,55 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+
+
+class CollectionVersion(db.Model):
+    """Change counter per collection ('articles', 'categories', 'tags') used for HTTP validators"""
+    __tablename__ = 'collection_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=1, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    @classmethod
+    def bump(cls, *names):
+        """Increment the given versions as part of the current transaction (caller commits)"""
+        now = datetime.utcnow()
+        for name in names:
+            updated = cls.query.filter_by(name=name) \
+                .update({cls.version: cls.version + 1, cls.updated_at: now}, synchronize_session=False)
+            if not updated:
+                db.session.add(cls(name=name, version=1, updated_at=now))
+    
+    @classmethod
+    def current(cls, *names):
+        """Return {name: (version, updated_at)}, creating rows that do not exist yet"""
+        rows = {row.name: (row.version, row.updated_at)
+                for row in cls.query.filter(cls.name.in_(names)).all()}
+        
+        missing = [name for name in names if name not in rows]
+        if missing:
+            try:
+                for name in missing:
+                    db.session.add(cls(name=name))
+                db.session.commit()
+            except IntegrityError:
+                # Another worker created them first
+                db.session.rollback()
+            rows = {row.name: (row.version, row.updated_at)
+                    for row in cls.query.filter(cls.name.in_(names)).all()}
+        
+        return rows
+    
+    @classmethod
+    def advanced(cls, known, name):
+        """
+        Current versions of the collections in `known` when the only change
+        since then is a single bump of `name` (the caller's own write),
+        otherwise None
+        """
+        current = cls.current(*known)
+        for other, (version, _) in current.items():
+            if version != known[other][0] + (other == name):
+                return None
+        return current
@@ -0,0 +1,18 @@
+from app import db
+from datetime import datetime
+
+
+class SummaryCacheEntry(db.Model):
+    """Generated AI summary, addressed by a hash of content, filters, length, model and prompt version"""
+    __tablename__ = 'summary_cache'
+    
+    key = db.Column(db.String(64), primary_key=True)                  # sha256 of everything below
+    content_key = db.Column(db.String(64), nullable=False, index=True)  # same, without the filters
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'),
+                           nullable=True, index=True)
+    filters = db.Column(db.String(100), nullable=False)  # comma-separated, sorted
+    length = db.Column(db.String(20), nullable=False)
+    model = db.Column(db.String(50), nullable=False)
+    prompt_version = db.Column(db.Integer, nullable=False)
+    summary = db.Column(db.Text, nullable=False)  # JSON object, one key per filter
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,14 @@
+from app import db
+from datetime import datetime
+
+
+class SummaryJob(db.Model):
+    """Background summary generation in flight (or failed) for one content version"""
+    __tablename__ = 'summary_jobs'
+    
+    content_key = db.Column(db.String(64), primary_key=True)  # summary_store.content_key of the job input
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'),
+                           nullable=False, index=True)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, failed
+    error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.article import Article
@@ -6,87 +6,421 @@ from app.models.category import Category
 from app.models.tag import Tag
 from app.models.user import User
 from app.models.admin_log import AdminLog
+from app.models.collection_version import CollectionVersion
 from app.utils.auth_helpers import admin_required, get_current_user
 from app.utils.validators import validate_article_data
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.http_cache import make_etag, is_not_modified, with_validators, not_modified
 from app.services.export import generate_article_pdf, generate_article_txt
+from app.services.search import search_index
+from app.services.fuzzy import fuzzy_index
+from app.services.suggest import suggest_index
+from app.services.text_analysis import analysis_cache
+from app.services.related import related_index, RELATED_TOP_K
+from app.services.article_listing import list_select, fetch_list_items, load_list_items, with_bookmark_status
+from app.services.response_cache import response_cache, article_surrogate_keys
+from app.services.article_counts import article_total, capped_count, apply_article_change, COUNT_CAP
+from app.services.facets import parse_facets, compute_facets
+from app.services.snippets import snippets_for
+from app.services.summary_store import summary_store, same_summary_input
+from app.services.summary_jobs import summary_jobs
+from app.services import duplicates
+from app.services.views import view_counter, trending_cache, TRENDING_TOP_N
+from sqlalchemy import or_, and_
 from datetime import datetime
 from io import BytesIO
 import math
 
 bp = Blueprint('articles', __name__)
 
+# Seconds a client should wait before asking again while the related index is being built
+RELATED_RETRY_AFTER = 2
+
+
+def _filter_clauses(category_id, date_from, date_to):
+    """WHERE clauses for the listing filters"""
+    clauses = []
+    
+    if category_id:
+        clauses.append(Article.category_id == category_id)
+    
+    if date_from:
+        clauses.append(Article.published_date >= date_from)
+    
+    if date_to:
+        clauses.append(Article.published_date <= date_to)
+    
+    return clauses
+
+
+def _ranked_search(search, category_id=None, date_from=None, date_to=None):
+    """
+    Ranked [(article_id, score), ...] for a search plus an optional
+    "did you mean" correction used when the query as typed matches nothing.
+    """
+    search_index.ensure_fresh()
+    ranked = search_index.search(search, category_id=category_id,
+                                 date_from=date_from, date_to=date_to)
+    if ranked:
+        return ranked, None
+    
+    # Nothing matched: retry with the spelling-corrected query, then fall
+    # back to trigram similarity over titles and tag names
+    fuzzy_index.ensure_fresh()
+    suggestion = fuzzy_index.suggest(search)
+    if suggestion:
+        ranked = search_index.search(suggestion, category_id=category_id,
+                                     date_from=date_from, date_to=date_to)
+        if ranked:
+            return ranked, suggestion
+    
+    ranked = search_index.filter_ranked(fuzzy_index.search(search), category_id=category_id,
+                                        date_from=date_from, date_to=date_to)
+    return ranked, suggestion
+
+
+def _cursor_page(ranked, category_id, date_from, date_to, cursor, page_size):
+    """
+    Keyset pagination over (published_date, id), newest first.
+    `ranked` is the search result list, or None when not searching.
+    Returns (articles, next_cursor, prev_cursor).
+    """
+    position = decode_cursor(cursor) if cursor else None
+    direction = position[2] if position else 'next'
+    
+    if ranked is not None:
+        # Order the matching set by (published_date, id) and seek in memory
+        keys = sorted(((search_index.published_date(article_id), article_id) for article_id, _ in ranked),
+                      reverse=True)
+        if position:
+            anchor = position[:2]
+            if direction == 'next':
+                keys = [key for key in keys if key < anchor]
+            else:
+                keys = [key for key in keys if key > anchor][::-1]
+        window = keys[:page_size + 1]
+        has_more = len(window) > page_size
+        window = window[:page_size]
+        if direction == 'prev':
+            window.reverse()
+        articles = load_list_items([article_id for _, article_id in window])
+    else:
+        query = list_select().where(*_filter_clauses(category_id, date_from, date_to))
+        if position:
+            anchor_date, anchor_id = position[:2]
+            if direction == 'next':
+                query = query.where(or_(
+                    Article.published_date < anchor_date,
+                    and_(Article.published_date == anchor_date, Article.id < anchor_id)
+                )).order_by(Article.published_date.desc(), Article.id.desc())
+            else:
+                query = query.where(or_(
+                    Article.published_date > anchor_date,
+                    and_(Article.published_date == anchor_date, Article.id > anchor_id)
+                )).order_by(Article.published_date.asc(), Article.id.asc())
+        else:
+            query = query.order_by(Article.published_date.desc(), Article.id.desc())
+        
+        articles = fetch_list_items(query.limit(page_size + 1))
+        has_more = len(articles) > page_size
+        articles = articles[:page_size]
+        if direction == 'prev':
+            articles.reverse()
+    
+    next_cursor = prev_cursor = None
+    if articles:
+        first, last = articles[0], articles[-1]
+        if has_more if direction == 'next' else True:
+            next_cursor = encode_cursor(last.published_date, last.id, 'next')
+        if position and (direction == 'next' or has_more):
+            prev_cursor = encode_cursor(first.published_date, first.id, 'prev')
+    
+    return articles, next_cursor, prev_cursor
+
 
 @bp.route('', methods=['GET'])
 def get_articles():
-    """Get articles with search and pagination"""
+    """
+    Get articles with search and pagination.
+    Passing `cursor` (empty for the first page) switches to keyset pagination;
+    `count=false` skips computing `total`/`pages`; `facets=category,tag,month`
+    adds facet counts for the matching set; `snippets=true` adds highlighted
+    fragments around the matched terms to search hits.
+    """
     try:
         # Get query parameters
-        search = request.args.get('search', '')
+        search = request.args.get('search', '').strip()
         category_id = request.args.get('category_id', type=int)
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
+        cursor = request.args.get('cursor')
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('limit', 10, type=int)
+        with_count = request.args.get('count', 'true').lower() != 'false'
+        with_snippets = bool(search) and request.args.get('snippets', 'false').lower() == 'true'
         
-        # Build query
-        query = Article.query
+        try:
+            facets = parse_facets(request.args.get('facets'))
+            date_from_obj = datetime.fromisoformat(date_from.replace('Z', '+00:00')) if date_from else None
+            date_to_obj = datetime.fromisoformat(date_to.replace('Z', '+00:00')) if date_to else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Apply filters
-        if search:
-            query = query.filter(
-                (Article.title.contains(search)) | 
-                (Article.content.contains(search))
-            )
-        
-        if category_id:
-            query = query.filter_by(category_id=category_id)
+        # Get current user for bookmark status
+        current_user = get_current_user()
+        user_id = current_user.id if current_user else None
         
-        if date_from:
-            date_from_obj = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-            query = query.filter(Article.published_date >= date_from_obj)
+        cache_key = ('articles', search.lower(), category_id, date_from, date_to,
+                     cursor, page, page_size, with_count, facets, with_snippets)
+        payload = response_cache.get(cache_key)
+        
+        if payload is None:
+            try:
+                payload = _build_listing(search, category_id, date_from_obj, date_to_obj, cursor,
+                                         page, page_size, with_count, with_snippets)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            surrogate_keys = {'listing'}
+            for item in payload['items']:
+                surrogate_keys |= article_surrogate_keys(item)
+            
+            if facets:
+                payload['facets'] = _facet_counts(search, category_id, date_from_obj, date_to_obj, facets)
+                surrogate_keys.update(f"category:{facet['id']}" for facet in payload['facets'].get('category', ()))
+                surrogate_keys.update(f"tag:{facet['id']}" for facet in payload['facets'].get('tag', ()))
+            
+            response_cache.set(cache_key, payload, surrogate_keys)
+        
+        # Per-user fields are layered on top of the shared cached payload
+        return jsonify(dict(payload, items=with_bookmark_status(payload['items'], user_id))), 200
         
-        if date_to:
-            date_to_obj = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-            query = query.filter(Article.published_date <= date_to_obj)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _facet_counts(search, category_id, date_from, date_to, facets):
+    """Facet counts for the listing's matching set (category facet ignores the category filter)"""
+    if search:
+        ranked, _ = _ranked_search(search, date_from=date_from, date_to=date_to)
+        return compute_facets(facets, article_ids=[article_id for article_id, _ in ranked],
+                              category_id=category_id)
+    
+    return compute_facets(facets, clauses=_filter_clauses(None, date_from, date_to),
+                          category_id=category_id)
+
+
+def _serialize_items(articles, search, did_you_mean, with_snippets):
+    """List item dicts, with highlighted fragments for the (corrected) query when asked"""
+    items = [article.to_dict() for article in articles]
+    if with_snippets:
+        snippets = snippets_for(articles, did_you_mean or search)
+        for item in items:
+            item['snippets'] = snippets.get(item['id'], [])
+    return items
+
+
+def _build_listing(search, category_id, date_from_obj, date_to_obj, cursor, page, page_size,
+                   with_count=True, with_snippets=False):
+    """Build the user-independent listing payload for get_articles"""
+    ranked = did_you_mean = None
+    if search:
+        ranked, did_you_mean = _ranked_search(search, category_id, date_from_obj, date_to_obj)
+    
+    if cursor is not None:
+        articles, next_cursor, prev_cursor = _cursor_page(
+            ranked, category_id, date_from_obj, date_to_obj, cursor, page_size
+        )
+        return {
+            'items': _serialize_items(articles, search, did_you_mean, with_snippets),
+            'limit': page_size,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'did_you_mean': did_you_mean
+        }
+    
+    total = None
+    is_estimate = False
+    
+    if search:
+        # Only the requested page is loaded; totals are capped like filtered counts
+        if with_count:
+            total, is_estimate = min(len(ranked), COUNT_CAP), len(ranked) > COUNT_CAP
+        has_more = len(ranked) > page * page_size
+        articles = load_list_items([article_id for article_id, _ in ranked[(page - 1) * page_size:page * page_size]])
+    else:
+        clauses = _filter_clauses(category_id, date_from_obj, date_to_obj)
+        
+        if with_count:
+            if date_from_obj or date_to_obj:
+                total, is_estimate = capped_count(clauses)
+            else:
+                # Unfiltered and category-only totals come from maintained counters
+                total = article_total(category_id)
+        
+        # Paginate, sorted by published date (newest first)
+        articles = fetch_list_items(
+            list_select().where(*clauses)
+            .order_by(Article.published_date.desc(), Article.id.desc())
+            .offset((page - 1) * page_size).limit(page_size + 1)
+        )
+        has_more = len(articles) > page_size
+        articles = articles[:page_size]
+    
+    return {
+        'items': _serialize_items(articles, search, did_you_mean, with_snippets),
+        'total': total,
+        'total_is_estimate': is_estimate,
+        'page': page,
+        'limit': page_size,
+        'pages': math.ceil(total / page_size) if total is not None else None,
+        'has_more': has_more,
+        'did_you_mean': did_you_mean
+    }
+
+
+@bp.route('/<int:article_id>', methods=['GET'])
+def get_article(article_id):
+    """Get single article by ID (supports If-None-Match / If-Modified-Since)"""
+    try:
+        updated_at = db.session.query(Article.updated_at).filter_by(id=article_id).scalar()
         
-        # Sort by published date (newest first)
-        query = query.order_by(Article.published_date.desc())
+        if not updated_at:
+            return jsonify({'error': 'Article not found'}), 404
         
         # Get current user for bookmark status
         current_user = get_current_user()
         user_id = current_user.id if current_user else None
+        bookmarked = bool(Article.bookmarked_ids(user_id, [article_id])) if user_id else False
+        
+        # Category and tag renames change the embedded data without touching the article
+        versions = CollectionVersion.current('categories', 'tags')
+        etag = make_etag('article', article_id, updated_at, versions['categories'], versions['tags'],
+                         user_id, bookmarked)
+        last_modified = max([updated_at] + [updated for _, updated in versions.values()])
+        
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified, private=bool(user_id))
+        
+        # Revalidations above are not views. In-memory only; flushed to article_views in the background
+        view_counter.record(article_id)
+        
+        cache_key = ('article', article_id)
+        data = response_cache.get(cache_key)
+        
+        if data is None:
+            article = Article.query.get(article_id)
+            
+            if not article:
+                return jsonify({'error': 'Article not found'}), 404
+            
+            data = article.to_dict(include_content=True)
+            response_cache.set(cache_key, data, article_surrogate_keys(data))
+        
+        if user_id:
+            data = dict(data, is_bookmarked=bookmarked)
+        
+        return with_validators(jsonify(data), etag, last_modified, private=bool(user_id)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/trending', methods=['GET'])
+def get_trending_articles():
+    """Most viewed articles of the last few days, recent views weighted more"""
+    try:
+        limit = max(1, min(request.args.get('limit', 10, type=int), TRENDING_TOP_N))
+        
+        ranked = trending_cache.top(limit)
+        scores = dict(ranked)
         
-        # Paginate
-        total = query.count()
-        total_pages = math.ceil(total / page_size)
-        articles = query.offset((page - 1) * page_size).limit(page_size).all()
+        items = [dict(item.to_dict(), trending_score=scores[item.id])
+                 for item in load_list_items([article_id for article_id, _ in ranked])]
         
+        current_user = get_current_user()
         return jsonify({
-            'items': [article.to_dict(include_content=False, user_id=user_id) for article in articles],
-            'total': total,
-            'page': page,
-            'limit': page_size,
-            'pages': total_pages
+            'items': with_bookmark_status(items, current_user.id if current_user else None)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@bp.route('/<int:article_id>', methods=['GET'])
-def get_article(article_id):
-    """Get single article by ID"""
+@bp.route('/<int:article_id>/related', methods=['GET'])
+def get_related_articles(article_id):
+    """Articles most similar to this one, from the precomputed neighbour lists"""
     try:
-        article = Article.query.get(article_id)
+        limit = max(1, min(request.args.get('limit', 5, type=int), RELATED_TOP_K))
         
-        if not article:
+        if not db.session.query(Article.id).filter_by(id=article_id).scalar():
             return jsonify({'error': 'Article not found'}), 404
         
-        # Get current user for bookmark status
+        related_index.ensure_fresh()
+        if not related_index.ready():
+            # This worker is still building the index in the background
+            response = jsonify({'items': [], 'status': 'pending', 'retry_after': RELATED_RETRY_AFTER})
+            response.headers['Retry-After'] = str(RELATED_RETRY_AFTER)
+            return response, 202
+        neighbours = related_index.related(article_id, limit)
+        scores = dict(neighbours)
+        
+        items = [dict(item.to_dict(), score=round(scores[item.id], 4))
+                 for item in load_list_items([article_id for article_id, _ in neighbours])]
+        
         current_user = get_current_user()
-        user_id = current_user.id if current_user else None
+        return jsonify({
+            'items': with_bookmark_status(items, current_user.id if current_user else None)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _article_saved(article):
+    """Refresh in-process indexes and caches after an article write has committed"""
+    search_index.add_article(article)
+    related_index.add_article(article)
+    fuzzy_index.add_article(article.id, article.title, [tag.id for tag in article.tags])
+    fuzzy_index.note_write('articles')
+    suggest_index.add_article(article.id, article.title, article.published_date)
+    suggest_index.note_write('articles')
+    response_cache.invalidate('listing', f'article:{article.id}')
+
+
+def _article_deleted(article_id):
+    """Drop a deleted article from in-process indexes and caches"""
+    search_index.remove(article_id)
+    related_index.remove(article_id)
+    fuzzy_index.remove_article(article_id)
+    fuzzy_index.note_write('articles')
+    suggest_index.remove_article(article_id)
+    suggest_index.note_write('articles')
+    analysis_cache.discard(article_id)
+    trending_cache.discard(article_id)
+    response_cache.invalidate('listing', f'article:{article_id}')
+
+
+def _rejects_duplicates(data):
+    """Whether a write with near-duplicates should be refused (`allow_duplicate` overrides)"""
+    return current_app.config['DUPLICATE_POLICY'] == 'reject' and not data.get('allow_duplicate')
+
+
+@bp.route('/duplicates', methods=['GET'])
+@admin_required
+def get_duplicate_clusters():
+    """List clusters of near-duplicate articles (admin only)"""
+    try:
+        threshold = request.args.get('threshold', type=float)
+        if threshold is not None and not 0 < threshold <= 1:
+            return jsonify({'error': 'threshold must be between 0 and 1'}), 400
         
-        return jsonify(article.to_dict(include_content=True, user_id=user_id)), 200
+        clusters = duplicates.duplicate_clusters(threshold)
+        
+        return jsonify({
+            'clusters': clusters,
+            'total': len(clusters)
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -104,6 +438,15 @@ def create_article():
         if errors:
             return jsonify({'errors': errors}), 400
         
+        # Near-duplicates are flagged, or rejected when DUPLICATE_POLICY is 'reject'
+        signature = duplicates.signature(data['title'], data['content'])
+        similar = duplicates.find_duplicates(signature)
+        if similar and _rejects_duplicates(data):
+            return jsonify({
+                'error': 'Article looks like a duplicate of an existing article',
+                'duplicates': similar
+            }), 409
+        
         # Create article
         article = Article(
             title=data['title'],
@@ -121,8 +464,16 @@ def create_article():
             article.tags = tags
         
         db.session.add(article)
+        db.session.flush()
+        duplicates.store_signature(article.id, signature)
+        apply_article_change(new_category_id=article.category_id,
+                             new_tag_ids=[tag.id for tag in article.tags])
+        CollectionVersion.bump('articles')
         db.session.commit()
         
+        _article_saved(article)
+        summary_jobs.enqueue(article.id, article.content)
+        
         # Log admin action
         email = get_jwt_identity()
         admin = User.query.filter_by(email=email).first()
@@ -137,7 +488,8 @@ def create_article():
         
         return jsonify({
             'message': 'Article created successfully',
-            'article': article.to_dict()
+            'article': article.to_dict(),
+            'duplicates': similar
         }), 201
         
     except Exception as e:
@@ -157,6 +509,10 @@ def update_article(article_id):
         
         data = request.get_json()
         
+        old_category_id = article.category_id
+        old_tag_ids = [tag.id for tag in article.tags]
+        old_content = article.content
+        
         # Update fields
         if 'title' in data:
             article.title = data['title']
@@ -178,8 +534,35 @@ def update_article(article_id):
             tags = Tag.query.filter(Tag.id.in_(data['tag_ids'])).all()
             article.tags = tags
         
+        similar = []
+        if 'title' in data or 'content' in data:
+            signature = duplicates.signature(article.title, article.content)
+            similar = duplicates.find_duplicates(signature, exclude_id=article.id)
+            if similar and _rejects_duplicates(data):
+                db.session.rollback()
+                return jsonify({
+                    'error': 'Article looks like a duplicate of an existing article',
+                    'duplicates': similar
+                }), 409
+            duplicates.store_signature(article.id, signature)
+        
+        apply_article_change(old_category_id, int(article.category_id),
+                             old_tag_ids, [tag.id for tag in article.tags])
+        
+        # Summaries are content-addressed; drop the rows of the old text
+        content_changed = not same_summary_input(old_content, article.content)
+        if content_changed:
+            summary_store.invalidate_article(article.id)
+        
+        # Tag changes alone do not issue an UPDATE on articles, so stamp it explicitly
+        article.updated_at = datetime.utcnow()
+        CollectionVersion.bump('articles')
         db.session.commit()
         
+        _article_saved(article)
+        if content_changed:
+            summary_jobs.enqueue(article.id, article.content)
+        
         # Log admin action
         email = get_jwt_identity()
         admin = User.query.filter_by(email=email).first()
@@ -194,7 +577,8 @@ def update_article(article_id):
         
         return jsonify({
             'message': 'Article updated successfully',
-            'article': article.to_dict()
+            'article': article.to_dict(),
+            'duplicates': similar
         }), 200
         
     except Exception as e:
@@ -224,9 +608,16 @@ def delete_article(article_id):
         )
         db.session.add(log)
         
+        apply_article_change(old_category_id=article.category_id,
+                             old_tag_ids=[tag.id for tag in article.tags])
+        duplicates.forget(article_id)
+        summary_store.invalidate_article(article_id)
         db.session.delete(article)
+        CollectionVersion.bump('articles')
         db.session.commit()
         
+        _article_deleted(article_id)
+        
         return jsonify({'message': 'Article deleted successfully'}), 200
         
     except Exception as e:
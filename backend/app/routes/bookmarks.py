@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select
 from app import db
 from app.models.bookmark import Bookmark
 from app.models.article import Article
 from app.models.user import User
+from app.services.article_listing import load_list_items
 
 bp = Blueprint('bookmarks', __name__)
 
@@ -19,10 +21,21 @@ def get_bookmarks():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        bookmarks = Bookmark.query.filter_by(user_id=user.id).order_by(Bookmark.created_at.desc()).all()
+        rows = db.session.execute(
+            select(Bookmark.id, Bookmark.article_id, Bookmark.created_at)
+            .where(Bookmark.user_id == user.id)
+            .order_by(Bookmark.created_at.desc())
+        ).all()
+        
+        # Load the bookmarked articles (list columns only) in one batch
+        items = {item.id: item for item in load_list_items([row.article_id for row in rows])}
         
         return jsonify({
-            'bookmarks': [bookmark.to_dict() for bookmark in bookmarks]
+            'bookmarks': [{
+                'id': row.id,
+                'article': items[row.article_id].to_dict(bookmarked=True),
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            } for row in rows if row.article_id in items]
         }), 200
         
     except Exception as e:
@@ -1,36 +1,39 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models.category import Category
+from app.models.collection_version import CollectionVersion
 from app.utils.auth_helpers import admin_required
+from app.utils.http_cache import make_etag, is_not_modified, with_validators, not_modified
+from app.services.response_cache import response_cache
+from app.services.suggest import suggest_index
 
 bp = Blueprint('categories', __name__)
 
 
 @bp.route('', methods=['GET'])
 def get_categories():
-    """Get all categories with article counts"""
+    """Get all categories with article counts (supports conditional GET)"""
     try:
-        from app.models.article import Article
-        from sqlalchemy import func
+        # Article counts change with article writes, names with category writes
+        versions = CollectionVersion.current('categories', 'articles')
+        etag = make_etag('categories', versions['categories'], versions['articles'])
+        last_modified = max(updated for _, updated in versions.values())
         
-        # Query categories with article count
-        results = db.session.query(Category, func.count(Article.id).label('count')) \
-            .outerjoin(Article) \
-            .group_by(Category.id) \
-            .all()
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified)
+        
+        # Article counts are maintained on the row, so no join is needed
+        categories = Category.query.order_by(Category.article_count.desc(), Category.id).all()
         
         categories_data = []
-        for cat, count in results:
+        for cat in categories:
             data = cat.to_dict()
-            data['article_count'] = count
+            data['article_count'] = cat.article_count
             categories_data.append(data)
             
-        # Sort by article count descending
-        categories_data.sort(key=lambda x: x['article_count'], reverse=True)
-            
-        return jsonify({
+        return with_validators(jsonify({
             'categories': categories_data
-        }), 200
+        }), etag, last_modified), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -55,8 +58,13 @@ def create_category():
         )
         
         db.session.add(category)
+        CollectionVersion.bump('categories')
         db.session.commit()
         
+        response_cache.invalidate(f'category:{category.id}')
+        suggest_index.set_category(category.id, category.name, category.slug)
+        suggest_index.note_write('categories')
+        
         return jsonify({
             'message': 'Category created successfully',
             'category': category.to_dict()
@@ -89,8 +97,13 @@ def update_category(category_id):
                 return jsonify({'error': 'Slug already in use'}), 400
             category.slug = data['slug']
         
+        CollectionVersion.bump('categories')
         db.session.commit()
         
+        response_cache.invalidate(f'category:{category_id}')
+        suggest_index.set_category(category.id, category.name, category.slug, category.article_count)
+        suggest_index.note_write('categories')
+        
         return jsonify({
             'message': 'Category updated successfully',
             'category': category.to_dict()
@@ -112,12 +125,17 @@ def delete_category(category_id):
             return jsonify({'error': 'Category not found'}), 404
         
         # Check if category has articles
-        if category.articles:
+        if category.article_count:
             return jsonify({'error': 'Cannot delete category with existing articles'}), 400
         
         db.session.delete(category)
+        CollectionVersion.bump('categories')
         db.session.commit()
         
+        response_cache.invalidate(f'category:{category_id}')
+        suggest_index.remove_category(category_id)
+        suggest_index.note_write('categories')
+        
         return jsonify({'message': 'Category deleted successfully'}), 200
         
     except Exception as e:
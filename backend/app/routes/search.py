@@ -0,0 +1,22 @@
+from flask import Blueprint, request, jsonify
+from app.services.suggest import suggest_index, MAX_SUGGESTIONS
+
+bp = Blueprint('search', __name__)
+
+
+@bp.route('/suggest', methods=['GET'])
+def suggest():
+    """Autocomplete over article titles, tag names and category names"""
+    try:
+        query = request.args.get('q', '')
+        limit = max(1, min(request.args.get('limit', 8, type=int), MAX_SUGGESTIONS))
+        
+        if not query.strip():
+            return jsonify({'suggestions': []}), 200
+        
+        suggest_index.ensure_fresh()
+        
+        return jsonify({'suggestions': suggest_index.suggest(query, limit)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,10 +1,35 @@
-from flask import Blueprint, request, jsonify
+import json
+import os
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required
 from app.models.article import Article
-from app.services.ai_summary import generate_summary
+from app.models.bookmark import Bookmark
+from app.services.ai_summary import (DEFAULT_FILTERS, SUMMARY_LENGTHS, GeminiSummarizer, SummaryError,
+                                     fallback_summary, get_summarizer)
+from app.services.summary_store import summary_store, summarize, summarize_stream
+from app.services.summary_jobs import summary_jobs, is_pending, job_status
+from app.services.gemini_client import gemini_client
+from app.services.llm_telemetry import llm_telemetry
+from app.utils.auth_helpers import admin_required, get_current_user
 
 bp = Blueprint('summary', __name__)
 
+# Seconds a client should wait before asking again for a summary still being generated
+PENDING_RETRY_AFTER = 2
+
+# Most articles one batch request may summarize
+MAX_BATCH_ARTICLES = 50
+
+
+def _invalid_filters(filters):
+    return not filters or any(f not in DEFAULT_FILTERS for f in filters)
+
+
+def _invalid_length(length):
+    # Part of the cache key and stored in summary_cache.length
+    return length not in SUMMARY_LENGTHS
+
 
 @bp.route('/summarize', methods=['POST'])
 @jwt_required()
@@ -15,24 +40,205 @@ def create_summary():
         
         # Get content
         content = None
+        article_id = None
         if data.get('article_id'):
             article = Article.query.get(data['article_id'])
             if not article:
                 return jsonify({'error': 'Article not found'}), 404
             content = article.content
+            article_id = article.id
         elif data.get('content'):
             content = data['content']
         else:
             return jsonify({'error': 'Either article_id or content is required'}), 400
         
         # Get filters
-        filters = data.get('filters', ['who', 'when', 'where', 'what', 'why', 'how'])
+        filters = data.get('filters', list(DEFAULT_FILTERS))
+        length = data.get('length', 'medium')
+        
+        if _invalid_filters(filters):
+            return jsonify({'error': f"filters must be a non-empty subset of {', '.join(DEFAULT_FILTERS)}"}), 400
+        if _invalid_length(length):
+            return jsonify({'error': f"length must be one of {', '.join(SUMMARY_LENGTHS)}"}), 400
+        
+        backend_name = data.get('backend', GeminiSummarizer.name)
+        backend = get_summarizer(backend_name)
+        if backend is None:
+            return jsonify({'error': f'Unknown summarizer backend: {backend_name}'}), 400
+        if backend_name != GeminiSummarizer.name:
+            # Local backends answer instantly and are not cached
+            response = jsonify(backend.summarize(content, filters, length))
+            response.headers['X-Summary-Backend'] = backend_name
+            return response, 200
+        
+        # Served from the summary cache when this content was summarized before
+        summary, cached = summarize(content, filters, length, article_id,
+                                    pending=lambda: article_id is not None and is_pending(content, length))
+        
+        if summary is None:
+            # A background job or another request is generating it; the client retries shortly
+            response = jsonify({'status': 'pending', 'retry_after': PENDING_RETRY_AFTER})
+            response.headers['Retry-After'] = str(PENDING_RETRY_AFTER)
+            return response, 202
+        
+        response = jsonify(summary)
+        response.headers['X-Summary-Cache'] = 'hit' if cached else 'miss'
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/summarize/stream', methods=['POST'])
+@jwt_required()
+def stream_summary():
+    """
+    Generate AI summary as Server-Sent Events: one `section` event per filter
+    (cached ones first, the rest as the model writes them), then `done`; or a
+    single `pending` event when the summary is already being generated.
+    """
+    try:
+        data = request.get_json() or {}
+        
+        content = None
+        article_id = None
+        if data.get('article_id'):
+            article = Article.query.get(data['article_id'])
+            if not article:
+                return jsonify({'error': 'Article not found'}), 404
+            content = article.content
+            article_id = article.id
+        elif data.get('content'):
+            content = data['content']
+        else:
+            return jsonify({'error': 'Either article_id or content is required'}), 400
+        
+        filters = data.get('filters', list(DEFAULT_FILTERS))
         length = data.get('length', 'medium')
         
-        # Generate summary
-        summary = generate_summary(content, filters, length)
+        if _invalid_filters(filters):
+            return jsonify({'error': f"filters must be a non-empty subset of {', '.join(DEFAULT_FILTERS)}"}), 400
+        if _invalid_length(length):
+            return jsonify({'error': f"length must be one of {', '.join(SUMMARY_LENGTHS)}"}), 400
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    def events():
+        try:
+            for event, payload in summarize_stream(content, filters, length, article_id,
+                                                   pending=lambda: article_id is not None and is_pending(content, length)):
+                if event == 'pending':
+                    payload = {'status': 'pending', 'retry_after': PENDING_RETRY_AFTER}
+                yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@bp.route('/summarize/batch', methods=['POST'])
+@jwt_required()
+def create_summary_batch():
+    """
+    AI summaries for several articles. Stored ones are returned at once; the
+    rest are generated by background jobs that pack them into shared model
+    calls, and the request answers 202 with Retry-After until they are ready.
+    """
+    try:
+        data = request.get_json() or {}
+        
+        if data.get('bookmarks'):
+            # The current user's most recent bookmarks
+            user = get_current_user()
+            if not user:
+                return jsonify({'error': 'User not found'}), 404
+            rows = (Bookmark.query.filter_by(user_id=user.id)
+                    .order_by(Bookmark.created_at.desc()).limit(MAX_BATCH_ARTICLES).all())
+            article_ids = [row.article_id for row in rows]
+        else:
+            article_ids = data.get('article_ids')
+            if (not isinstance(article_ids, list) or not article_ids
+                    or not all(isinstance(i, int) for i in article_ids)):
+                return jsonify({'error': 'article_ids must be a non-empty list of article IDs'}), 400
+            article_ids = list(dict.fromkeys(article_ids))
+            if len(article_ids) > MAX_BATCH_ARTICLES:
+                return jsonify({'error': f'At most {MAX_BATCH_ARTICLES} articles per batch'}), 400
+        
+        filters = data.get('filters', list(DEFAULT_FILTERS))
+        length = data.get('length', 'medium')
+        
+        if _invalid_filters(filters):
+            return jsonify({'error': f"filters must be a non-empty subset of {', '.join(DEFAULT_FILTERS)}"}), 400
+        if _invalid_length(length):
+            return jsonify({'error': f"length must be one of {', '.join(SUMMARY_LENGTHS)}"}), 400
+        
+        contents = dict(
+            Article.query.with_entities(Article.id, Article.content)
+            .filter(Article.id.in_(article_ids)).all()
+        ) if article_ids else {}
         
-        return jsonify(summary), 200
+        items = []
+        todo = []
+        for article_id in article_ids:
+            if article_id not in contents:
+                items.append({'article_id': article_id, 'status': 'not_found'})
+                continue
+            content = contents[article_id]
+            summary = summary_store.get(content, filters, length)
+            if summary is not None:
+                items.append({'article_id': article_id, 'status': 'cached', 'summary': summary})
+            elif job_status(content, length) == 'failed':
+                # Retried once the failed job expires (SUMMARY_JOB_TIMEOUT)
+                error = SummaryError('Background summary generation failed')
+                items.append({'article_id': article_id, 'status': 'failed',
+                              'summary': fallback_summary(filters, error, content, length)})
+            else:
+                items.append({'article_id': article_id, 'status': 'pending'})
+                todo.append((article_id, content))
+        
+        if todo and not summary_jobs.enqueue_batch(todo, filters, length):
+            response = jsonify({'error': 'Summary queue is full, try again later'})
+            response.headers['Retry-After'] = str(PENDING_RETRY_AFTER)
+            return response, 503
+        
+        counts = {}
+        for item in items:
+            counts[item['status']] = counts.get(item['status'], 0) + 1
+        
+        if todo:
+            response = jsonify({'status': 'pending', 'retry_after': PENDING_RETRY_AFTER,
+                                'results': items, 'counts': counts})
+            response.headers['Retry-After'] = str(PENDING_RETRY_AFTER)
+            return response, 202
+        return jsonify({'results': items, 'counts': counts}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/summarize/status', methods=['GET'])
+@admin_required
+def summary_status():
+    """Gemini client health for the answering worker (identified by pid): circuit breaker, retry budget, call counts"""
+    try:
+        return jsonify({'worker': os.getpid(), 'gemini': gemini_client.state()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/summarize/stats', methods=['GET'])
+@admin_required
+def summary_stats():
+    """Rolling LLM telemetry of all workers: latency, tokens, cost, parse failures, cache hit rate per endpoint"""
+    try:
+        return jsonify(llm_telemetry.snapshot()), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,19 +1,32 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models.tag import Tag
+from app.models.collection_version import CollectionVersion
 from app.utils.auth_helpers import admin_required
+from app.utils.http_cache import make_etag, is_not_modified, with_validators, not_modified
+from app.services.response_cache import response_cache
+from app.services.fuzzy import fuzzy_index
+from app.services.suggest import suggest_index
 
 bp = Blueprint('tags', __name__)
 
 
 @bp.route('', methods=['GET'])
 def get_tags():
-    """Get all tags"""
+    """Get all tags with article counts (supports conditional GET)"""
     try:
+        # Article counts change with article writes, names with tag writes
+        versions = CollectionVersion.current('tags', 'articles')
+        etag = make_etag('tags', versions['tags'], versions['articles'])
+        last_modified = max(updated for _, updated in versions.values())
+        
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified)
+        
         tags = Tag.query.all()
-        return jsonify({
-            'tags': [tag.to_dict() for tag in tags]
-        }), 200
+        return with_validators(jsonify({
+            'tags': [dict(tag.to_dict(), article_count=tag.article_count) for tag in tags]
+        }), etag, last_modified), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -38,8 +51,15 @@ def create_tag():
         )
         
         db.session.add(tag)
+        CollectionVersion.bump('tags')
         db.session.commit()
         
+        response_cache.invalidate(f'tag:{tag.id}')
+        fuzzy_index.set_tag(tag.id, tag.name)
+        fuzzy_index.note_write('tags')
+        suggest_index.set_tag(tag.id, tag.name, tag.slug, tag.article_count)
+        suggest_index.note_write('tags')
+        
         return jsonify({
             'message': 'Tag created successfully',
             'tag': tag.to_dict()
@@ -72,8 +92,15 @@ def update_tag(tag_id):
                 return jsonify({'error': 'Slug already in use'}), 400
             tag.slug = data['slug']
         
+        CollectionVersion.bump('tags')
         db.session.commit()
         
+        response_cache.invalidate(f'tag:{tag_id}')
+        fuzzy_index.set_tag(tag.id, tag.name)
+        fuzzy_index.note_write('tags')
+        suggest_index.set_tag(tag.id, tag.name, tag.slug, tag.article_count)
+        suggest_index.note_write('tags')
+        
         return jsonify({
             'message': 'Tag updated successfully',
             'tag': tag.to_dict()
@@ -95,12 +122,19 @@ def delete_tag(tag_id):
             return jsonify({'error': 'Tag not found'}), 404
         
         # Check if tag is used in any articles
-        if tag.articles:
+        if tag.article_count:
             return jsonify({'error': 'Cannot delete tag that is used in articles'}), 400
         
         db.session.delete(tag)
+        CollectionVersion.bump('tags')
         db.session.commit()
         
+        response_cache.invalidate(f'tag:{tag_id}')
+        fuzzy_index.remove_tag(tag_id)
+        fuzzy_index.note_write('tags')
+        suggest_index.remove_tag(tag_id)
+        suggest_index.note_write('tags')
+        
         return jsonify({'message': 'Tag deleted successfully'}), 200
         
     except Exception as e:
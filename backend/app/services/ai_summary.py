@@ -1,37 +1,81 @@
 import os
-import google.generativeai as genai
+import re
 import json
+from abc import ABC, abstractmethod
+from flask import current_app, has_app_context
+from app.services.extractive import extractive_summary, salient_excerpt
+from app.services.gemini_client import gemini_client
+from app.services.llm_telemetry import llm_telemetry
+from config import Config
 
-def generate_summary(content, filters, length='medium'):
+# Part of every summary cache key: bump PROMPT_VERSION whenever the prompt changes
+MODEL_NAME = 'gemini-2.5-flash'
+PROMPT_VERSION = 2
+
+DEFAULT_FILTERS = ('who', 'when', 'where', 'what', 'why', 'how')
+
+# Target lengths a summary can be requested at
+SUMMARY_LENGTHS = ('short', 'medium', 'long')
+
+# Rough size of a token, for prompt budgets
+CHARS_PER_TOKEN = 4
+
+# A complete "section": "text" pair inside a partially received JSON reply
+SECTION_RE = re.compile(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class SummaryError(Exception):
+    """The summary could not be generated (missing key, API failure, unparsable reply)"""
+
+
+class Summarizer(ABC):
     """
-    Generate AI summary based on content and filters using Google Gemini API.
+    A summary backend: `summarize` returns {filter: text} for exactly the
+    requested filters, or raises SummaryError. Backends missing `summarize`
+    cannot be instantiated, so they fail when registered in SUMMARIZERS.
     """
-    api_key = os.getenv('GEMINI_API_KEY')
-    
-    if not api_key:
-        return {
-            'error': 'Gemini API Key not found. Please set GEMINI_API_KEY in .env',
-            'who': 'API Key Missing',
-            'what': 'API Key Missing',
-            'where': 'API Key Missing',
-            'when': 'API Key Missing',
-            'why': 'API Key Missing',
-            'how': 'API Key Missing'
-        }
+    name = None
 
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash')
+    @abstractmethod
+    def summarize(self, content, filters, length='medium'):
+        """{filter: text} for content; raises SummaryError"""
 
-        # Construct dynamic JSON structure example
-        json_structure = ",\n            ".join([f'"{f}": "..."' for f in filters])
-        
-        prompt = f"""
+
+class GeminiSummarizer(Summarizer):
+    """The Gemini model; its summaries are the ones stored in the summary cache"""
+    name = 'gemini'
+
+    def summarize(self, content, filters, length='medium'):
+        return request_summary(content, filters, length)
+
+
+class ExtractiveSummarizer(Summarizer):
+    """Sentences, names, dates and places picked from the article itself: local, instant, never fails"""
+    name = 'extractive'
+
+    def summarize(self, content, filters, length='medium'):
+        return extractive_summary(content, filters, length)
+
+
+def get_summarizer(name):
+    """Registered backend by name, or None"""
+    return SUMMARIZERS.get(name)
+
+
+def summary_prompt(content, filters, length='medium'):
+    """Prompt asking for a JSON object with one entry per filter"""
+    # Only the sentences that can answer the requested filters, within the token budget
+    content = prompt_excerpt(content, filters)
+    
+    # Construct dynamic JSON structure example
+    json_structure = ",\n            ".join([f'"{f}": "..."' for f in filters])
+    
+    return f"""
         Analyze the following news article and extract the specific information requested below.
         Return the result ONLY as a valid JSON object. Do not include markdown formatting like ```json ... ```.
         
-        Article Content:
-        "{content[:4000]}"... (truncated if too long)
+        Article Content (the sentences relevant to the requested information; "…" marks omitted text):
+        "{content}"
 
         Requested Information (Filters): {', '.join(filters)}
         Target Length per section: {length}
@@ -45,26 +89,172 @@ def generate_summary(content, filters, length='medium'):
         Keep the summary for each section very concise and to the point (max 1-2 sentences).
         """
 
-        response = model.generate_content(prompt)
+
+def request_summary(content, filters, length='medium'):
+    """
+    Ask Gemini for a summary of content restricted to filters (sections
+    missing from the reply are left out; see missing_sections).
+    Raises SummaryError instead of returning placeholder text.
+    """
+    api_key = _api_key()
+
+    try:
+        prompt = summary_prompt(content, filters, length)
+        result = _parse_reply(gemini_client.generate(api_key, MODEL_NAME, prompt))
+    except Exception as e:
+        raise SummaryError(str(e)) from e
+    
+    # Strict filtering: Only return keys that were requested
+    summary = {k: v for k, v in result.items() if k in filters and isinstance(v, str)}
+    if len(summary) < len(set(filters)):
+        llm_telemetry.record_parse_failure()
+    return summary
+
+
+def stream_summary(content, filters, length='medium'):
+    """
+    Ask Gemini for a summary with a streamed reply and yield (filter, text)
+    as soon as each section's value has fully arrived. Sections missing from
+    the reply are simply not yielded; raises SummaryError if the call fails.
+    """
+    api_key = _api_key()
+    
+    received, position, emitted = '', 0, set()
+    try:
+        for chunk in gemini_client.stream(api_key, MODEL_NAME, summary_prompt(content, filters, length)):
+            received += chunk
+            for match in SECTION_RE.finditer(received, position):
+                position = match.end()
+                if match.group(1) in filters and match.group(1) not in emitted:
+                    emitted.add(match.group(1))
+                    yield match.group(1), json.loads(f'"{match.group(2)}"')
+    except Exception as e:
+        raise SummaryError(str(e)) from e
+    if len(emitted) < len(filters):
+        llm_telemetry.record_parse_failure()
+
+
+def request_batch_summaries(items, filters, length='medium'):
+    """
+    Summarize several articles with one Gemini call.
+    `items` is [(item_id, content), ...]; returns {item_id: summary} for the
+    items whose section of the reply parsed and covers every filter, so the
+    caller can retry just the rest. Raises SummaryError if the call fails.
+    """
+    api_key = _api_key()
+    
+    json_structure = ", ".join([f'"{f}": "..."' for f in filters])
+    articles = "\n\n".join(
+        f'Article ID {item_id}:\n"{prompt_excerpt(content, filters)}"' for item_id, content in items
+    )
+    
+    prompt = f"""
+        Analyze each of the following news articles and extract the specific information requested below.
+        Return the result ONLY as a valid JSON object with one entry per article, keyed by its Article ID.
+        Do not include markdown formatting like ```json ... ```.
         
-        # Clean up response if it contains markdown code blocks
-        text_response = response.text.replace('```json', '').replace('```', '').strip()
+        {articles}
         
-        result = json.loads(text_response)
+        Requested Information (Filters): {', '.join(filters)}
+        Target Length per section: {length}
         
-        # Strict filtering: Only return keys that were requested
-        filtered_result = {k: v for k, v in result.items() if k in filters}
+        JSON Structure required:
+        {{
+            "<Article ID>": {{{json_structure}}}
+        }}
         
-        return filtered_result
-
+        IMPORTANT: Only include the keys listed above ({', '.join(filters)}) for each article. Translate the analysis to Indonesian.
+        Keep the summary for each section very concise and to the point (max 1-2 sentences).
+        """
+    
+    try:
+        result = _parse_reply(gemini_client.generate(api_key, MODEL_NAME, prompt))
     except Exception as e:
+        raise SummaryError(str(e)) from e
+    
+    summaries = {}
+    for item_id, _ in items:
+        entry = result.get(str(item_id)) if isinstance(result, dict) else None
+        if isinstance(entry, dict) and all(isinstance(entry.get(f), str) for f in filters):
+            summaries[item_id] = {f: entry[f] for f in filters}
+    if len(summaries) < len(items):
+        llm_telemetry.record_parse_failure(len(items) - len(summaries))
+    return summaries
+
+
+def estimate_tokens(text):
+    """Rough prompt size"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def prompt_excerpt(content, filters):
+    """Article text for a prompt: the sentences answering filters, within SUMMARY_PROMPT_TOKENS"""
+    budget = current_app.config['SUMMARY_PROMPT_TOKENS'] if has_app_context() else Config.SUMMARY_PROMPT_TOKENS
+    return salient_excerpt(content, filters, budget * CHARS_PER_TOKEN)
+
+
+def _api_key():
+    api_key = os.getenv('GEMINI_API_KEY')
+    
+    if not api_key:
+        raise SummaryError('Gemini API Key not found. Please set GEMINI_API_KEY in .env')
+    return api_key
+
+
+def missing_sections(summary, filters):
+    """Requested filters the summary has no text for"""
+    return [f for f in filters if not isinstance(summary.get(f), str)]
+
+
+def _parse_reply(text):
+    # Clean up response if it contains markdown code blocks
+    try:
+        result = json.loads(text.replace('```json', '').replace('```', '').strip())
+    except ValueError:
+        llm_telemetry.record_parse_failure()
+        raise
+    if not isinstance(result, dict):
+        llm_telemetry.record_parse_failure()
+        raise ValueError('Reply is not a JSON object')
+    return result
+
+
+def fallback_summary(filters, error, content=None, length='medium'):
+    """
+    Sections returned to the client when generation failed: the
+    SUMMARY_FALLBACK backend's summary of content when there is one,
+    placeholders otherwise.
+    """
+    backend = get_summarizer(current_app.config['SUMMARY_FALLBACK'] if has_app_context() else 'extractive')
+    if content is not None and backend is not None:
+        try:
+            return backend.summarize(content, filters, length)
+        except Exception as e:
+            print(f"Fallback summarizer {backend.name} failed: {e}")
+    
+    if 'API Key not found' in str(error):
+        return dict({f: 'API Key Missing' for f in DEFAULT_FILTERS}, error=str(error))
+    return {k: "Gagal memuat ringkasan AI." for k in filters}
+
+
+def generate_summary(content, filters, length='medium'):
+    """
+    Generate AI summary based on content and filters using Google Gemini API.
+    """
+    try:
+        return request_summary(content, filters, length)
+    except SummaryError as e:
         print(f"Gemini API Error: {e}")
-        # Fallback to mock/error message if API fails
-        return {k: "Gagal memuat ringkasan AI." for k in filters}
-
-def extract_who(content, length): return ""
-def extract_when(content, length): return ""
-def extract_where(content, length): return ""
-def extract_what(content, length): return ""
-def extract_why(content, length): return ""
-def extract_how(content, length): return ""
+        # Fall back to the local extractive summary (or placeholders) if the API fails
+        return fallback_summary(filters, e, content, length)
+
+
+# Backends selectable by name (SUMMARY_FALLBACK, the `backend` request option)
+SUMMARIZERS = {backend.name: backend for backend in (GeminiSummarizer(), ExtractiveSummarizer())}
+
+def extract_who(content, length): return extractive_summary(content, ['who'], length)['who']
+def extract_when(content, length): return extractive_summary(content, ['when'], length)['when']
+def extract_where(content, length): return extractive_summary(content, ['where'], length)['where']
+def extract_what(content, length): return extractive_summary(content, ['what'], length)['what']
+def extract_why(content, length): return extractive_summary(content, ['why'], length)['why']
+def extract_how(content, length): return extractive_summary(content, ['how'], length)['how']
@@ -0,0 +1,69 @@
+from sqlalchemy import select, update, func
+from app import db
+from app.models.article import Article
+from app.models.category import Category
+from app.models.tag import Tag, article_tags
+
+# Filtered counts stop at this many rows and are reported as estimates
+COUNT_CAP = 1000
+
+
+def article_total(category_id=None):
+    """Number of articles, optionally within one category, from the maintained counters"""
+    if category_id:
+        query = select(Category.article_count).where(Category.id == category_id)
+    else:
+        query = select(func.coalesce(func.sum(Category.article_count), 0))
+    return int(db.session.execute(query).scalar() or 0)
+
+
+def apply_article_change(old_category_id=None, new_category_id=None, old_tag_ids=(), new_tag_ids=()):
+    """
+    Adjust categories.article_count and tags.article_count for an article
+    write. Runs in the caller's transaction; the caller commits.
+    """
+    if old_category_id != new_category_id:
+        if old_category_id:
+            db.session.execute(update(Category).where(Category.id == old_category_id)
+                               .values(article_count=Category.article_count - 1))
+        if new_category_id:
+            db.session.execute(update(Category).where(Category.id == new_category_id)
+                               .values(article_count=Category.article_count + 1))
+
+    old_tag_ids, new_tag_ids = set(old_tag_ids), set(new_tag_ids)
+    removed = old_tag_ids - new_tag_ids
+    added = new_tag_ids - old_tag_ids
+    if removed:
+        db.session.execute(update(Tag).where(Tag.id.in_(removed))
+                           .values(article_count=Tag.article_count - 1))
+    if added:
+        db.session.execute(update(Tag).where(Tag.id.in_(added))
+                           .values(article_count=Tag.article_count + 1))
+
+
+def recount_articles():
+    """Recompute every category and tag article_count from the source tables (caller commits)"""
+    category_counts = select(func.count(Article.id)) \
+        .where(Article.category_id == Category.id) \
+        .scalar_subquery()
+    db.session.execute(update(Category).values(article_count=category_counts))
+
+    tag_counts = select(func.count()) \
+        .select_from(article_tags) \
+        .where(article_tags.c.tag_id == Tag.id) \
+        .scalar_subquery()
+    db.session.execute(update(Tag).values(article_count=tag_counts))
+
+
+def capped_count(clauses, cap=None):
+    """
+    Count articles matching clauses, scanning at most cap + 1 rows.
+    Returns (count, is_estimate); is_estimate is True when the cap was hit.
+    """
+    cap = cap or COUNT_CAP
+    limited = select(Article.id).where(*clauses).limit(cap + 1).subquery()
+    count = db.session.execute(select(func.count()).select_from(limited)).scalar()
+    if count > cap:
+        return cap, True
+    return count, False
+
@@ -0,0 +1,119 @@
+from sqlalchemy import select
+from app import db
+from app.models.article import Article
+from app.models.category import Category
+from app.models.tag import Tag, article_tags
+
+articles_table = Article.__table__
+categories_table = Category.__table__
+tags_table = Tag.__table__
+
+# Columns needed for list views (everything except the content body)
+LIST_COLUMNS = (
+    articles_table.c.id,
+    articles_table.c.title,
+    articles_table.c.category_id,
+    articles_table.c.image_url,
+    articles_table.c.author_name,
+    articles_table.c.source_url,
+    articles_table.c.published_date,
+    articles_table.c.created_at,
+    articles_table.c.updated_at,
+)
+
+
+class ArticleListItem:
+    """Lightweight, read-only article row for list responses"""
+
+    __slots__ = ('id', 'title', 'category_id', 'image_url', 'author_name', 'source_url',
+                 'published_date', 'created_at', 'updated_at', 'category', 'tags')
+
+    def __init__(self, id, title, category_id, image_url, author_name, source_url,
+                 published_date, created_at, updated_at):
+        self.id = id
+        self.title = title
+        self.category_id = category_id
+        self.image_url = image_url
+        self.author_name = author_name
+        self.source_url = source_url
+        self.published_date = published_date
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.category = None
+        self.tags = ()
+
+    def to_dict(self, bookmarked=False):
+        """Convert to dictionary (same shape as Article.to_dict(include_content=False))"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'category': self.category,
+            'image_url': self.image_url,
+            'author_name': self.author_name,
+            'source_url': self.source_url,
+            'published_date': self.published_date.isoformat() if self.published_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'tags': list(self.tags),
+            'is_bookmarked': bookmarked
+        }
+
+
+def list_select():
+    """Core select over the list columns of articles"""
+    return select(*LIST_COLUMNS)
+
+
+def fetch_list_items(statement):
+    """Execute a select built from list_select() and attach categories and tags"""
+    items = [ArticleListItem(*row) for row in db.session.execute(statement)]
+    _attach_relations(items)
+    return items
+
+
+def load_list_items(article_ids):
+    """Load list items by id, preserving the given order"""
+    if not article_ids:
+        return []
+    items = fetch_list_items(list_select().where(articles_table.c.id.in_(article_ids)))
+    items_by_id = {item.id: item for item in items}
+    return [items_by_id[i] for i in article_ids if i in items_by_id]
+
+
+def with_bookmark_status(items, user_id=None):
+    """
+    Return copies of serialized list items with is_bookmarked filled in
+    for the user, resolved for the whole list with one query.
+    """
+    bookmarked = Article.bookmarked_ids(user_id, [item['id'] for item in items])
+    return [dict(item, is_bookmarked=item['id'] in bookmarked) for item in items]
+
+
+def _attach_relations(items):
+    """Fill category and tags for a page of items with one query each"""
+    if not items:
+        return
+
+    category_ids = {item.category_id for item in items}
+    categories = {
+        row.id: {'id': row.id, 'name': row.name, 'slug': row.slug}
+        for row in db.session.execute(
+            select(categories_table.c.id, categories_table.c.name, categories_table.c.slug)
+            .where(categories_table.c.id.in_(category_ids))
+        )
+    }
+
+    tags_by_article = {}
+    tag_rows = db.session.execute(
+        select(article_tags.c.article_id, tags_table.c.id, tags_table.c.name, tags_table.c.slug)
+        .join(tags_table, tags_table.c.id == article_tags.c.tag_id)
+        .where(article_tags.c.article_id.in_([item.id for item in items]))
+    )
+    for row in tag_rows:
+        tags_by_article.setdefault(row.article_id, []).append(
+            {'id': row.id, 'name': row.name, 'slug': row.slug}
+        )
+
+    for item in items:
+        item.category = categories.get(item.category_id)
+        item.tags = tags_by_article.get(item.id, ())
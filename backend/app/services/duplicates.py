@@ -0,0 +1,203 @@
+import zlib
+from collections import defaultdict
+from hashlib import blake2b
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, delete, and_, or_
+from app import db
+from app.models.article import Article
+from app.models.article_lsh_bucket import ArticleLshBucket
+from app.services.text_analysis import tokenize
+
+# Signature length; LSH splits it into LSH_BANDS bands of LSH_ROWS values.
+# Pairs above ~(1 / LSH_BANDS) ** (1 / LSH_ROWS) similarity (about 0.7) share a band.
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# Hash family h(x) = (a * x + b) mod p over 31-bit shingle hashes (products fit in uint64)
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Fixed seed: signatures are stored, so the permutations must never change
+_rng = np.random.default_rng(1_000_003)
+_PERM_A = _rng.integers(1, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(title, content):
+    """Hashed word shingles of an article's normalized title and content"""
+    words = tokenize(title) + tokenize(content)
+    if len(words) < SHINGLE_SIZE:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    return np.array(sorted({zlib.crc32(gram.encode('utf-8')) & MERSENNE_PRIME for gram in grams}),
+                    dtype=np.uint64)
+
+
+def signature(title, content):
+    """MinHash signature (NUM_PERM uint32 values), or None for an empty article"""
+    hashed = shingles(title, content)
+    if not len(hashed):
+        return None
+    permuted = (np.outer(_PERM_A, hashed) + _PERM_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def pack(sig):
+    return sig.astype('<u4').tobytes()
+
+
+def unpack(data):
+    return np.frombuffer(data, dtype='<u4')
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(sig_a == sig_b))
+
+
+def band_keys(sig):
+    """[(band, bucket), ...] for a signature; bucket is a signed 64-bit hash of the band"""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = sig[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = blake2b(pack(rows), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return keys
+
+
+def _threshold(threshold):
+    return threshold if threshold is not None else current_app.config['DUPLICATE_THRESHOLD']
+
+
+def find_duplicates(sig, exclude_id=None, threshold=None):
+    """
+    [{'id', 'title', 'similarity'}, ...] for stored articles whose signature
+    is at least `threshold` similar, found through the LSH buckets (one
+    indexed lookup per band, independent of corpus size).
+    """
+    if sig is None:
+        return []
+    threshold = _threshold(threshold)
+    bucket_match = or_(*[and_(ArticleLshBucket.band == band, ArticleLshBucket.bucket == bucket)
+                         for band, bucket in band_keys(sig)])
+    query = select(ArticleLshBucket.article_id).where(bucket_match).distinct()
+    if exclude_id is not None:
+        query = query.where(ArticleLshBucket.article_id != exclude_id)
+    candidates = db.session.execute(query).scalars().all()
+    if not candidates:
+        return []
+
+    duplicates = []
+    rows = db.session.execute(
+        select(Article.id, Article.title, Article.minhash).where(Article.id.in_(candidates))
+    )
+    for article_id, title, minhash in rows:
+        if minhash is None:
+            continue
+        score = similarity(sig, unpack(minhash))
+        if score >= threshold:
+            duplicates.append({'id': article_id, 'title': title, 'similarity': round(score, 3)})
+    duplicates.sort(key=lambda item: (-item['similarity'], item['id']))
+    return duplicates
+
+
+def store_signature(article_id, sig):
+    """Save an article's signature and replace its LSH buckets (caller commits)"""
+    # Keep updated_at as is: a signature is derived data, not an edit
+    db.session.execute(
+        Article.__table__.update().where(Article.id == article_id)
+        .values(minhash=pack(sig) if sig is not None else None, updated_at=Article.updated_at)
+    )
+    forget(article_id)
+    if sig is not None:
+        db.session.execute(ArticleLshBucket.__table__.insert(), [
+            {'band': band, 'bucket': bucket, 'article_id': article_id}
+            for band, bucket in band_keys(sig)
+        ])
+
+
+def forget(article_id):
+    """Drop an article's LSH buckets (caller commits)"""
+    db.session.execute(delete(ArticleLshBucket).where(ArticleLshBucket.article_id == article_id))
+
+
+def index_signatures(only_missing=True):
+    """Compute and store signatures for articles (by default only those without one); caller commits"""
+    query = select(Article.id, Article.title, Article.content)
+    if only_missing:
+        query = query.where(Article.minhash.is_(None))
+    rows = db.session.execute(query).all()
+    for article_id, title, content in rows:
+        store_signature(article_id, signature(title, content))
+    return len(rows)
+
+
+def duplicate_clusters(threshold=None):
+    """
+    Groups of near-duplicate articles across the corpus, largest first.
+    Candidate pairs come from shared LSH buckets and are verified against
+    the stored signatures before being merged into clusters.
+    """
+    threshold = _threshold(threshold)
+    buckets = defaultdict(list)
+    for band, bucket, article_id in db.session.execute(
+            select(ArticleLshBucket.band, ArticleLshBucket.bucket, ArticleLshBucket.article_id)):
+        buckets[(band, bucket)].append(article_id)
+
+    pairs = set()
+    for members in buckets.values():
+        if len(members) > 1:
+            members.sort()
+            pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+    if not pairs:
+        return []
+
+    ids = {article_id for pair in pairs for article_id in pair}
+    articles = {row.id: row for row in db.session.execute(
+        select(Article.id, Article.title, Article.published_date, Article.minhash)
+        .where(Article.id.in_(ids))
+    )}
+
+    parent = {}
+
+    def find(article_id):
+        parent.setdefault(article_id, article_id)
+        while parent[article_id] != article_id:
+            parent[article_id] = parent[parent[article_id]]
+            article_id = parent[article_id]
+        return article_id
+
+    best = {}
+    for a, b in pairs:
+        if a not in articles or b not in articles:
+            continue
+        score = similarity(unpack(articles[a].minhash), unpack(articles[b].minhash))
+        if score >= threshold:
+            parent[find(a)] = find(b)
+            best[a] = max(best.get(a, 0.0), score)
+            best[b] = max(best.get(b, 0.0), score)
+
+    clusters = defaultdict(list)
+    for article_id in parent:
+        clusters[find(article_id)].append(article_id)
+
+    result = []
+    for members in clusters.values():
+        members.sort()
+        result.append({
+            'size': len(members),
+            'articles': [{
+                'id': article_id,
+                'title': articles[article_id].title,
+                'published_date': articles[article_id].published_date.isoformat(),
+                'similarity': round(best[article_id], 3)
+            } for article_id in members]
+        })
+    result.sort(key=lambda cluster: (-cluster['size'], cluster['articles'][0]['id']))
+    return result
@@ -0,0 +1,271 @@
+import re
+from collections import Counter
+
+import numpy as np
+from app.services.text_analysis import STOPWORDS, analyze, clean_text, split_sentences
+
+# Sentences ('what') and names/dates/places (who, when, where) reported per length
+SENTENCES_PER_LENGTH = {'short': 1, 'medium': 2, 'long': 3}
+ITEMS_PER_LENGTH = {'short': 2, 'medium': 3, 'long': 5}
+
+# Section text when the article gives no answer
+NOT_MENTIONED = 'Tidak disebutkan dalam artikel.'
+
+# Longer sentences are cut at a word boundary
+MAX_SENTENCE_CHARS = 280
+
+# Sentences shorter than this (in content words) are only picked when nothing else is left
+MIN_SENTENCE_TERMS = 4
+
+# TextRank damping factor and power-iteration limits
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+# News leads carry the gist: sentence i gets LEAD_BONUS / (i + 1) on top of its score
+LEAD_BONUS = 0.1
+
+DAYS = r'Senin|Selasa|Rabu|Kamis|Jumat|Jum\'at|Sabtu|Minggu|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday'
+MONTHS = (r'Januari|Februari|Maret|April|Mei|Juni|Juli|Agustus|September|Oktober|November|Desember|'
+          r'January|February|March|May|June|July|August|October|December|'
+          r'Jan|Feb|Mar|Apr|Jun|Jul|Agu|Agt|Aug|Sep|Okt|Oct|Nov|Des|Dec')
+RELATIVE_DATES = (r'hari ini|kemarin|besok|lusa|tadi (?:pagi|siang|sore|malam)|(?:pagi|siang|sore|malam) ini|'
+                  r'(?:pekan|minggu|bulan|tahun) (?:lalu|depan|ini)')
+
+DATE_RE = re.compile(
+    rf'\b(?:(?:{DAYS}),?\s+)?\d{{1,2}}\s+(?:{MONTHS})\.?(?:\s+\d{{4}})?\b'
+    rf'|\b(?:{MONTHS})\s+\d{{1,2}},?\s+\d{{4}}\b'
+    rf'|\b(?:{MONTHS})\s+\d{{4}}\b'
+    r'|\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
+    r'|\b(?i:pukul)\s+\d{1,2}[.:]\d{2}(?:\s*(?:WIB|WITA|WIT))?'
+    rf'|\b(?i:{RELATIVE_DATES})\b'
+    rf'|\b(?:{DAYS})(?:\s+(?:pagi|siang|sore|malam))?\b'
+    r'|\b(?:19|20)\d{2}\b'
+)
+
+# A run of capitalized words ("Joko Widodo", "Kalimantan Timur") or an acronym ("KPU")
+NAME = r"[A-Z][\w'’.-]*(?:\s+(?:[A-Z][\w'’.-]*|bin|binti|van|de))*(?<![.-])"
+NAME_RE = re.compile(rf'\b{NAME}')
+PLACE_RE = re.compile(rf'\b(?:di|ke|dari|in|at|from)\s+({NAME})')
+
+CAUSE_RE = re.compile(r'\b(?:karena|sebab|akibat|disebabkan|dipicu|lantaran|alasan|because|due to)\b', re.IGNORECASE)
+MANNER_RE = re.compile(r'\b(?:dengan cara|melalui|menggunakan|memanfaatkan|caranya|by using|through)\b',
+                       re.IGNORECASE)
+DATE_WORD_RE = re.compile(rf'^(?:{DAYS}|{MONTHS})$')
+
+# Joins non-adjacent sentences in an excerpt
+GAP = ' … '
+
+# Sentence ends missing their space ("...di Jakarta.Komisi ...")
+JOINED_SENTENCE_RE = re.compile(r'(?<=[a-z0-9)"][.!?])(?=[A-Z][a-z])')
+
+
+def article_sentences(content):
+    """Distinct sentences of content in order of first appearance"""
+    sentences = []
+    for sentence in split_sentences(clean_text(content)):
+        sentences.extend(part.strip() for part in JOINED_SENTENCE_RE.split(sentence) if part.strip())
+    return list(dict.fromkeys(sentences))
+
+
+def rank_sentences(sentences):
+    """
+    Salience score per sentence: TextRank over the TF-IDF cosine-similarity
+    graph of the sentences, averaged with each sentence's similarity to the
+    document centroid, plus a small bonus for leading sentences.
+    """
+    n = len(sentences)
+    if not n:
+        return np.zeros(0)
+    terms = [analyze(sentence) for sentence in sentences]
+    vocabulary = {}
+    for sentence_terms in terms:
+        for term in sentence_terms:
+            vocabulary.setdefault(term, len(vocabulary))
+
+    tf = np.zeros((n, max(len(vocabulary), 1)))
+    for row, sentence_terms in enumerate(terms):
+        for term, count in Counter(sentence_terms).items():
+            tf[row, vocabulary[term]] = count
+    df = np.count_nonzero(tf, axis=0)
+    vectors = tf * (np.log((1 + n) / (1 + df)) + 1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no terms with the rest link uniformly, keeping the walk stochastic
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight > 0, out_weight, 1), 1.0 / n)
+    rank = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * (transition.T @ rank)
+        converged = np.abs(updated - rank).sum() < TOLERANCE
+        rank = updated
+        if converged:
+            break
+
+    centroid = vectors.mean(axis=0)
+    centroid_norm = np.linalg.norm(centroid)
+    centrality = vectors @ centroid / centroid_norm if centroid_norm else np.zeros(n)
+
+    score = 0.5 * rank / rank.max() + 0.5 * (centrality / centrality.max() if centrality.max() > 0 else 0)
+    score = score + LEAD_BONUS / (np.arange(n) + 1)
+    short = np.array([len(sentence_terms) < MIN_SENTENCE_TERMS for sentence_terms in terms])
+    if not short.all():
+        score[short] = -1.0
+    return score
+
+
+def _shorten(sentence):
+    if len(sentence) <= MAX_SENTENCE_CHARS:
+        return sentence
+    return sentence[:MAX_SENTENCE_CHARS].rsplit(' ', 1)[0].rstrip(',;:') + '…'
+
+
+def _top_items(matches, limit):
+    """Most frequent distinct items, ties broken by first appearance"""
+    counts = Counter()
+    first = {}
+    for position, item in enumerate(matches):
+        key = item.lower()
+        counts[key] += 1
+        first.setdefault(key, (position, item))
+    ranked = sorted(counts, key=lambda key: (-counts[key], first[key][0]))
+    return [first[key][1] for key in ranked[:limit]]
+
+
+def _list_or_missing(items):
+    return ', '.join(items) + '.' if items else NOT_MENTIONED
+
+
+def extract_dates(sentences):
+    matches = []
+    for sentence in sentences:
+        found = [match.group(0) for match in DATE_RE.finditer(sentence)]
+        # Drop bare years and days already part of a fuller date in the same sentence
+        matches.extend(date for date in found
+                       if not any(date != other and date in other for other in found))
+    return matches
+
+
+def extract_places(sentences):
+    return [match.group(1) for sentence in sentences for match in PLACE_RE.finditer(sentence)
+            if not DATE_WORD_RE.match(match.group(1))]
+
+
+def extract_people(sentences, places):
+    """Capitalized names and acronyms, skipping places, dates and capitalized sentence openers"""
+    places = {place.lower() for place in places}
+    matches = []
+    for sentence in sentences:
+        dates = [match.span() for match in DATE_RE.finditer(sentence)]
+        for match in NAME_RE.finditer(sentence):
+            name = match.group(0)
+            words = name.split()
+            if match.start() == 0 and len(words) == 1 and not name.isupper():
+                continue
+            if any(start < match.end() and match.start() < end for start, end in dates):
+                continue
+            if name.lower() in places or words[0].lower() in STOPWORDS:
+                continue
+            matches.append(name)
+    return matches
+
+
+def _best_matching(sentences, scores, pattern):
+    candidates = [i for i, sentence in enumerate(sentences) if pattern.search(sentence)]
+    if not candidates:
+        return NOT_MENTIONED
+    return _shorten(sentences[max(candidates, key=lambda i: scores[i])])
+
+
+def _answers(f, sentence):
+    """Whether sentence carries the kind of cue that answers filter f"""
+    if f == 'who':
+        return bool(extract_people([sentence], []))
+    if f == 'when':
+        return DATE_RE.search(sentence) is not None
+    if f == 'where':
+        return PLACE_RE.search(sentence) is not None
+    if f == 'why':
+        return CAUSE_RE.search(sentence) is not None
+    if f == 'how':
+        return MANNER_RE.search(sentence) is not None
+    return True
+
+
+def salient_excerpt(content, filters, max_chars):
+    """
+    Content cut down to about max_chars for a model prompt: the whole text
+    when it fits, otherwise the best-ranked sentences answering each filter
+    (names for 'who', dates for 'when', places for 'where', causal and
+    manner cues for 'why' and 'how', any sentence for 'what'), taken in
+    turn per filter after the lead sentence and returned in article order
+    with gaps marked.
+    """
+    text = clean_text(content)
+    if len(text) <= max_chars:
+        return text
+    sentences = [_shorten(sentence) for sentence in article_sentences(text)]
+    scores = rank_sentences(sentences)
+    order = np.argsort(-scores, kind='stable')
+    candidates = [[i for i in order if _answers(f, sentences[i])] for f in filters]
+
+    # The lead sentence anchors whatever else is picked
+    chosen, used = {0}, len(sentences[0]) + len(GAP)
+    progress = True
+    while progress:
+        progress = False
+        for queue in candidates:
+            while queue and queue[0] in chosen:
+                queue.pop(0)
+            if queue and used + len(sentences[queue[0]]) + len(GAP) <= max_chars:
+                i = queue.pop(0)
+                chosen.add(i)
+                used += len(sentences[i]) + len(GAP)
+                progress = True
+            elif queue:
+                # Too long for what is left of the budget; try this filter's next candidate
+                queue.pop(0)
+                progress = True
+
+    excerpt, previous = '', None
+    for i in sorted(chosen):
+        if previous is not None:
+            excerpt += ' ' if i == previous + 1 else GAP
+        excerpt += sentences[i]
+        previous = i
+    if previous is not None and previous < len(sentences) - 1:
+        excerpt += GAP.rstrip()
+    return excerpt
+
+
+def extractive_summary(content, filters, length='medium'):
+    """
+    5W1H summary built from the article's own sentences: 'what' is the top
+    ranked sentences, 'why' and 'how' the best sentence with a causal or
+    manner cue, and who/when/where the most mentioned names, dates and places.
+    """
+    sentences = article_sentences(content)
+    scores = rank_sentences(sentences)
+    items = ITEMS_PER_LENGTH.get(length, ITEMS_PER_LENGTH['medium'])
+
+    summary = {}
+    places = extract_places(sentences)
+    for f in filters:
+        if f == 'what':
+            count = SENTENCES_PER_LENGTH.get(length, SENTENCES_PER_LENGTH['medium'])
+            chosen = sorted(np.argsort(-scores, kind='stable')[:count])
+            summary[f] = ' '.join(_shorten(sentences[i]) for i in chosen) or NOT_MENTIONED
+        elif f == 'who':
+            summary[f] = _list_or_missing(_top_items(extract_people(sentences, places), items))
+        elif f == 'when':
+            summary[f] = _list_or_missing(_top_items(extract_dates(sentences), items))
+        elif f == 'where':
+            summary[f] = _list_or_missing(_top_items(places, items))
+        elif f == 'why':
+            summary[f] = _best_matching(sentences, scores, CAUSE_RE)
+        elif f == 'how':
+            summary[f] = _best_matching(sentences, scores, MANNER_RE)
+    return summary
@@ -0,0 +1,76 @@
+from collections import Counter
+
+from sqlalchemy import select
+from app import db
+from app.models.article import Article
+from app.models.category import Category
+from app.models.tag import Tag, article_tags
+
+FACETS = ('category', 'tag', 'month')
+
+
+def parse_facets(value):
+    """Parse the comma-separated `facets` parameter; raises ValueError on unknown names"""
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in FACETS]
+    if unknown:
+        raise ValueError(f"Unknown facet(s): {', '.join(unknown)}")
+    return tuple(sorted(set(names)))
+
+
+def compute_facets(names, clauses=(), article_ids=None, category_id=None):
+    """
+    Count category, tag and month facets over the matching articles in a
+    single streamed query.
+
+    `clauses`/`article_ids` describe the matching set *without* the category
+    filter, so the category facet shows what every category would yield;
+    tag and month counts are restricted to `category_id` when given.
+    """
+    if article_ids is not None and not article_ids:
+        return {name: [] for name in names}
+
+    query = select(Article.id, Article.category_id, Article.published_date, article_tags.c.tag_id) \
+        .outerjoin(article_tags, article_tags.c.article_id == Article.id) \
+        .where(*clauses)
+    if article_ids is not None:
+        query = query.where(Article.id.in_(article_ids))
+
+    category_counts = Counter()
+    tag_counts = Counter()
+    month_counts = Counter()
+    seen = set()
+
+    # One row per (article, tag); articles without tags appear once with tag_id NULL
+    for article_id, cat_id, published, tag_id in db.session.execute(query).yield_per(1000):
+        in_category = not category_id or cat_id == category_id
+        if article_id not in seen:
+            seen.add(article_id)
+            category_counts[cat_id] += 1
+            if in_category:
+                month_counts[published.strftime('%Y-%m')] += 1
+        if tag_id is not None and in_category:
+            tag_counts[tag_id] += 1
+
+    facets = {}
+    if 'category' in names:
+        facets['category'] = _labelled(Category, category_counts)
+    if 'tag' in names:
+        facets['tag'] = _labelled(Tag, tag_counts)
+    if 'month' in names:
+        facets['month'] = [{'month': month, 'count': count}
+                           for month, count in sorted(month_counts.items(), reverse=True)]
+    return facets
+
+
+def _labelled(model, counts):
+    """Attach id/name/slug to facet counts, largest first"""
+    if not counts:
+        return []
+    rows = db.session.execute(
+        select(model.id, model.name, model.slug).where(model.id.in_(list(counts)))
+    )
+    labelled = [{'id': row.id, 'name': row.name, 'slug': row.slug, 'count': counts[row.id]}
+                for row in rows]
+    labelled.sort(key=lambda facet: (-facet['count'], facet['name']))
+    return labelled
@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.article import Article
+from app.models.collection_version import CollectionVersion
+from app.models.tag import Tag, article_tags
+from app.services.text_analysis import tokenize
+
+# Minimum Jaccard similarity between trigram sets for two words to match
+MIN_SIMILARITY = 0.3
+
+# Words shorter than this are not fuzzily matched (too many false positives)
+MIN_WORD_LENGTH = 3
+
+
+def trigrams(word):
+    """Character trigrams of a word, padded so prefixes and suffixes count"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyIndex:
+    """
+    Character-trigram index over the words of article titles and tag names,
+    used for typo-tolerant lookup and "did you mean" suggestions.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.word_refs = Counter()               # word -> number of titles/tags using it
+        self.gram_words = defaultdict(set)       # trigram -> words containing it
+        self.title_words = {}                    # article_id -> words of its title
+        self.word_articles = defaultdict(set)    # word -> article ids with it in the title
+        self.tag_words = {}                      # tag_id -> words of its name
+        self.word_tags = defaultdict(set)        # word -> tag ids with it in the name
+        self.tag_articles = defaultdict(set)     # tag_id -> article ids
+        self.article_tags = {}                   # article_id -> tag ids
+        self.version = None
+        self.last_check = 0.0
+
+    # ------------------------------------------------------------------
+    # Vocabulary
+    # ------------------------------------------------------------------
+
+    def _ref_word(self, word):
+        if self.word_refs[word] == 0:
+            for gram in trigrams(word):
+                self.gram_words[gram].add(word)
+        self.word_refs[word] += 1
+
+    def _unref_word(self, word):
+        self.word_refs[word] -= 1
+        if self.word_refs[word] <= 0:
+            del self.word_refs[word]
+            for gram in trigrams(word):
+                words = self.gram_words.get(gram)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del self.gram_words[gram]
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def add_article(self, article_id, title, tag_ids=()):
+        """Index (or re-index) an article's title words and tag membership"""
+        words = set(tokenize(title))
+        with self._lock:
+            self._remove_article(article_id)
+            self.title_words[article_id] = words
+            for word in words:
+                self._ref_word(word)
+                self.word_articles[word].add(article_id)
+            self.article_tags[article_id] = set(tag_ids)
+            for tag_id in tag_ids:
+                self.tag_articles[tag_id].add(article_id)
+
+    def remove_article(self, article_id):
+        with self._lock:
+            self._remove_article(article_id)
+
+    def _remove_article(self, article_id):
+        for word in self.title_words.pop(article_id, ()):
+            self._unref_word(word)
+            self.word_articles[word].discard(article_id)
+            if not self.word_articles[word]:
+                del self.word_articles[word]
+        for tag_id in self.article_tags.pop(article_id, ()):
+            self.tag_articles[tag_id].discard(article_id)
+
+    def set_tag(self, tag_id, name):
+        """Index (or re-index) a tag name"""
+        words = set(tokenize(name))
+        with self._lock:
+            self._remove_tag_words(tag_id)
+            self.tag_words[tag_id] = words
+            for word in words:
+                self._ref_word(word)
+                self.word_tags[word].add(tag_id)
+
+    def remove_tag(self, tag_id):
+        with self._lock:
+            self._remove_tag_words(tag_id)
+            for article_id in self.tag_articles.pop(tag_id, ()):
+                self.article_tags.get(article_id, set()).discard(tag_id)
+
+    def _remove_tag_words(self, tag_id):
+        for word in self.tag_words.pop(tag_id, ()):
+            self._unref_word(word)
+            self.word_tags[word].discard(tag_id)
+            if not self.word_tags[word]:
+                del self.word_tags[word]
+
+    def build(self):
+        """Rebuild from article titles, tag names and article_tags (no content is read)"""
+        versions = CollectionVersion.current('articles', 'tags')
+        tags_by_article = defaultdict(list)
+        for article_id, tag_id in db.session.execute(
+                select(article_tags.c.article_id, article_tags.c.tag_id)):
+            tags_by_article[article_id].append(tag_id)
+
+        with self._lock:
+            self._reset()
+            for tag_id, name in db.session.execute(select(Tag.id, Tag.name)):
+                self.set_tag(tag_id, name)
+            for article_id, title in db.session.execute(select(Article.id, Article.title)):
+                self.add_article(article_id, title, tags_by_article.get(article_id, ()))
+            self.version = versions
+            self.last_check = time.monotonic()
+
+    def note_write(self, name):
+        """
+        Adopt the version bump of a write this worker committed and already
+        patched in, so the next check does not rebuild for it
+        """
+        known = self.version
+        if known is None:
+            return
+        current = CollectionVersion.advanced(known, name)
+        with self._lock:
+            if current is not None and self.version is known:
+                self.version = current
+
+    def ensure_fresh(self):
+        """Build on first use; rebuild when another worker changed articles or tags"""
+        if self.version is None:
+            self.build()
+            return
+        if time.monotonic() - self.last_check < current_app.config['SEARCH_INDEX_SYNC_INTERVAL']:
+            return
+        self.last_check = time.monotonic()
+        if CollectionVersion.current('articles', 'tags') != self.version:
+            self.build()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def similar_words(self, word, limit=5):
+        """[(vocabulary word, similarity), ...] most similar to word, best first"""
+        if len(word) < MIN_WORD_LENGTH:
+            return [(word, 1.0)] if word in self.word_refs else []
+        grams = trigrams(word)
+        shared = Counter()
+        with self._lock:
+            for gram in grams:
+                for candidate in self.gram_words.get(gram, ()):
+                    shared[candidate] += 1
+            scored = []
+            for candidate, common in shared.items():
+                similarity = common / (len(grams) + len(trigrams(candidate)) - common)
+                if similarity >= MIN_SIMILARITY:
+                    scored.append((candidate, similarity))
+        # Ties go to the more common word
+        scored.sort(key=lambda item: (-item[1], -self.word_refs.get(item[0], 0), item[0]))
+        return scored[:limit]
+
+    def suggest(self, query):
+        """Corrected query with each word replaced by its best vocabulary match, or None"""
+        words = tokenize(query)
+        corrected = []
+        for word in words:
+            matches = self.similar_words(word, limit=1)
+            corrected.append(matches[0][0] if matches else word)
+        if not words or corrected == words:
+            return None
+        return ' '.join(corrected)
+
+    def search(self, query):
+        """
+        [(article_id, score), ...] for articles whose title or tags contain
+        words similar to every query word, ranked by summed similarity.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        scores = None
+        with self._lock:
+            for word in words:
+                word_scores = {}
+                for candidate, similarity in self.similar_words(word):
+                    article_ids = set(self.word_articles.get(candidate, ()))
+                    for tag_id in self.word_tags.get(candidate, ()):
+                        article_ids |= self.tag_articles.get(tag_id, set())
+                    for article_id in article_ids:
+                        if similarity > word_scores.get(article_id, 0.0):
+                            word_scores[article_id] = similarity
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {article_id: score + word_scores[article_id]
+                              for article_id, score in scores.items() if article_id in word_scores}
+                if not scores:
+                    return []
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+# Shared per-process index
+fuzzy_index = FuzzyIndex()
@@ -0,0 +1,242 @@
+import random
+import threading
+import time
+from collections import deque
+
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+from flask import current_app, has_app_context
+from config import Config
+from app.services.llm_telemetry import llm_telemetry
+
+# Upstream errors worth another attempt
+RETRYABLE_ERRORS = (
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.GatewayTimeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+# First retry sleeps up to this long; each further retry doubles it (full jitter)
+BACKOFF_BASE = 0.5  # seconds
+
+# Most retries the budget can bank
+RETRY_BUDGET_CAP = 10.0
+
+
+class CircuitOpenError(Exception):
+    """Gemini has been failing; calls are refused until the cooldown ends"""
+
+
+def _setting(name):
+    # Usable outside a request too (scripts, the REPL)
+    return current_app.config[name] if has_app_context() else getattr(Config, name)
+
+
+def _usage(usage, prompt, reply_chars):
+    """Prompt and response token counts reported by Gemini, estimated (4 chars a token) when missing"""
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) or len(prompt) // 4 + 1
+    response_tokens = getattr(usage, 'candidates_token_count', 0) or reply_chars // 4 + 1
+    return prompt_tokens, response_tokens
+
+
+def _chunk_text(chunk):
+    """Text of one streamed chunk; the closing chunk may carry only the finish reason and token counts"""
+    if not chunk.candidates or not chunk.candidates[0].content.parts:
+        return ''
+    return chunk.text
+
+
+class GeminiClient:
+    """
+    Long-lived Gemini access for one process: configured models are reused,
+    every call has a deadline, retries use jittered exponential backoff and
+    draw from a retry budget (a fraction of recent calls), and a circuit
+    breaker refuses calls for a cooldown once the recent failure rate
+    crosses GEMINI_BREAKER_THRESHOLD.
+
+    Breaker states: 'closed' (normal), 'open' (failing fast) and
+    'half_open' (one probe call decides whether to close again).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+        self._api_key = None
+        self._outcomes = deque()  # (monotonic time, succeeded) within the breaker window
+        self._state = 'closed'
+        self._opened_at = 0.0
+        self._probing = False
+        self._retry_tokens = RETRY_BUDGET_CAP
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+        self.last_error = None
+
+    def generate(self, api_key, model_name, prompt):
+        """Reply text for prompt; raises the last upstream error, or CircuitOpenError"""
+        self._admit()
+        started = time.monotonic()
+        deadline = started + _setting('GEMINI_DEADLINE')
+        with self._lock:
+            self._retry_tokens = min(RETRY_BUDGET_CAP, self._retry_tokens + _setting('GEMINI_RETRY_BUDGET'))
+
+        attempt = 0
+        while True:
+            timeout = min(_setting('GEMINI_TIMEOUT'), deadline - time.monotonic())
+            try:
+                if timeout <= 0:
+                    raise api_exceptions.DeadlineExceeded('Gemini call deadline exceeded')
+                # retry=None: api_core's default Retry (up to 600s) would hide attempts from this loop
+                response = self._model(api_key, model_name).generate_content(
+                    prompt, request_options={'timeout': timeout, 'retry': None}
+                )
+                text = response.text
+            except Exception as e:
+                self._record(False, e)
+                backoff = random.uniform(0, BACKOFF_BASE * 2 ** attempt)
+                if (not isinstance(e, RETRYABLE_ERRORS) or attempt >= _setting('GEMINI_MAX_RETRIES')
+                        or time.monotonic() + backoff >= deadline or not self._take_retry()):
+                    llm_telemetry.record_call('generate', time.monotonic() - started, 0, 0, False, attempt + 1)
+                    raise
+                attempt += 1
+                time.sleep(backoff)
+                continue
+            self._record(True)
+            llm_telemetry.record_call('generate', time.monotonic() - started,
+                                      *_usage(getattr(response, 'usage_metadata', None), prompt, len(text)),
+                                      True, attempt + 1)
+            return text
+
+    def stream(self, api_key, model_name, prompt):
+        """
+        Reply text chunks for prompt as they arrive. The whole stream shares
+        one GEMINI_DEADLINE timeout and is never retried (the reader may
+        already have used part of it).
+        """
+        self._admit()
+        started = time.monotonic()
+        received, usage = 0, None
+        try:
+            response = self._model(api_key, model_name).generate_content(
+                prompt, stream=True, request_options={'timeout': _setting('GEMINI_DEADLINE'), 'retry': None}
+            )
+            for chunk in response:
+                # The last chunk carries the token counts of the whole reply
+                usage = getattr(chunk, 'usage_metadata', None) or usage
+                text = _chunk_text(chunk)
+                received += len(text)
+                if text:
+                    yield text
+        except GeneratorExit:
+            # The reader went away; that says nothing about Gemini's health
+            self._abandon()
+            raise
+        except Exception as e:
+            self._record(False, e)
+            llm_telemetry.record_call('stream', time.monotonic() - started, 0, 0, False)
+            raise
+        self._record(True)
+        llm_telemetry.record_call('stream', time.monotonic() - started, *_usage(usage, prompt, received), True)
+
+    def state(self):
+        """Breaker and retry-budget snapshot for monitoring"""
+        with self._lock:
+            self._expire(time.monotonic())
+            window_calls = len(self._outcomes)
+            window_failures = sum(1 for _, ok in self._outcomes if not ok)
+            open_for = 0.0
+            if self._state == 'open':
+                open_for = max(self._opened_at + _setting('GEMINI_BREAKER_COOLDOWN') - time.monotonic(), 0.0)
+            return {
+                'state': self._state,
+                'window_calls': window_calls,
+                'window_failure_rate': round(window_failures / window_calls, 3) if window_calls else 0.0,
+                'open_for': round(open_for, 1),
+                'retry_tokens': round(self._retry_tokens, 2),
+                'calls': self.calls,
+                'failures': self.failures,
+                'retries': self.retries,
+                'rejected': self.rejected,
+                'last_error': self.last_error
+            }
+
+    def _model(self, api_key, model_name):
+        with self._lock:
+            if api_key != self._api_key:
+                genai.configure(api_key=api_key)
+                self._api_key = api_key
+                self._models.clear()
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._models[model_name] = genai.GenerativeModel(model_name)
+            return model
+
+    def _admit(self):
+        with self._lock:
+            if self._state == 'open':
+                if time.monotonic() - self._opened_at < _setting('GEMINI_BREAKER_COOLDOWN'):
+                    self.rejected += 1
+                    llm_telemetry.record_rejected()
+                    raise CircuitOpenError('Gemini circuit breaker is open')
+                self._state = 'half_open'
+            if self._state == 'half_open':
+                if self._probing:
+                    self.rejected += 1
+                    llm_telemetry.record_rejected()
+                    raise CircuitOpenError('Gemini circuit breaker is half-open')
+                self._probing = True
+
+    def _abandon(self):
+        with self._lock:
+            self._probing = False
+
+    def _take_retry(self):
+        with self._lock:
+            if self._state != 'closed' or self._retry_tokens < 1:
+                return False
+            self._retry_tokens -= 1
+            self.retries += 1
+            return True
+
+    def _record(self, succeeded, error=None):
+        now = time.monotonic()
+        with self._lock:
+            self.calls += 1
+            if not succeeded:
+                self.failures += 1
+                self.last_error = f'{type(error).__name__}: {error}'[:200]
+
+            if self._state == 'half_open':
+                self._probing = False
+                if succeeded:
+                    self._state = 'closed'
+                    self._outcomes.clear()
+                else:
+                    self._state, self._opened_at = 'open', now
+                return
+
+            self._outcomes.append((now, succeeded))
+            self._expire(now)
+            if succeeded or self._state != 'closed':
+                return
+            failed = sum(1 for _, ok in self._outcomes if not ok)
+            if (len(self._outcomes) >= _setting('GEMINI_BREAKER_MIN_CALLS')
+                    and failed / len(self._outcomes) >= _setting('GEMINI_BREAKER_THRESHOLD')):
+                self._state, self._opened_at = 'open', now
+                print(f"Gemini circuit breaker opened: {failed}/{len(self._outcomes)} recent calls failed")
+
+    def _expire(self, now):
+        window = _setting('GEMINI_BREAKER_WINDOW')
+        while self._outcomes and now - self._outcomes[0][0] > window:
+            self._outcomes.popleft()
+
+
+# Shared per-process client (each gunicorn worker keeps its own breaker)
+gemini_client = GeminiClient()
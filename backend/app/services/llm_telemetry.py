@@ -0,0 +1,330 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+from flask import current_app, has_app_context, has_request_context, request
+from config import Config
+
+# Histogram bucket upper bounds
+LATENCY_BOUNDS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 40000)
+TOKEN_BOUNDS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+# Width of one rolling-window slot
+SLOT_SECONDS = 60
+
+# Recent calls kept for the slowest/costliest lists
+RECENT_CALLS = 500
+TOP_CALLS = 5
+
+# Each worker writes its telemetry to the instance folder this often (when it changed)
+FLUSH_INTERVAL = 5  # seconds
+
+COUNTERS = ('calls', 'failures', 'rejected', 'parse_failures', 'cache_hits', 'cache_misses')
+
+
+def _setting(name):
+    return current_app.config[name] if has_app_context() else getattr(Config, name)
+
+
+def _endpoint():
+    """Flask endpoint of the current request; 'background' for jobs and CLI commands"""
+    if has_request_context() and request.endpoint:
+        return request.endpoint
+    return 'background'
+
+
+def _cost(prompt_tokens, response_tokens):
+    return (prompt_tokens * _setting('GEMINI_INPUT_PRICE_PER_M')
+            + response_tokens * _setting('GEMINI_OUTPUT_PRICE_PER_M')) / 1_000_000
+
+
+class Histogram:
+    """Counts per bucket (one per upper bound plus an overflow bucket), with sum and max"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def to_state(self):
+        return [self.counts, self.count, self.sum, self.max]
+
+    @classmethod
+    def from_state(cls, bounds, state):
+        histogram = cls(bounds)
+        histogram.counts, histogram.count, histogram.sum, histogram.max = state
+        return histogram
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (the max for the overflow bucket)"""
+        if not self.count:
+            return 0.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= q * self.count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        buckets = {f'<={bound}': n for bound, n in zip(self.bounds, self.counts)}
+        buckets[f'>{self.bounds[-1]}'] = self.counts[-1]
+        return {
+            'count': self.count,
+            'mean': round(self.sum / self.count, 1) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 1),
+            'p95': round(self.quantile(0.95), 1),
+            'p99': round(self.quantile(0.99), 1),
+            'max': round(self.max, 1),
+            'buckets': buckets
+        }
+
+
+class _Stats:
+    """Counters and histograms of one endpoint over one slot (or merged slots)"""
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.latency = Histogram(LATENCY_BOUNDS_MS)
+        self.prompt_tokens = Histogram(TOKEN_BOUNDS)
+        self.response_tokens = Histogram(TOKEN_BOUNDS)
+
+    def merge(self, other):
+        for name, n in other.counters.items():
+            self.counters[name] += n
+        self.latency.merge(other.latency)
+        self.prompt_tokens.merge(other.prompt_tokens)
+        self.response_tokens.merge(other.response_tokens)
+
+    def to_state(self):
+        return {
+            'counters': self.counters,
+            'latency': self.latency.to_state(),
+            'prompt_tokens': self.prompt_tokens.to_state(),
+            'response_tokens': self.response_tokens.to_state()
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        stats.counters.update(state['counters'])
+        stats.latency = Histogram.from_state(LATENCY_BOUNDS_MS, state['latency'])
+        stats.prompt_tokens = Histogram.from_state(TOKEN_BOUNDS, state['prompt_tokens'])
+        stats.response_tokens = Histogram.from_state(TOKEN_BOUNDS, state['response_tokens'])
+        return stats
+
+    def to_dict(self):
+        lookups = self.counters['cache_hits'] + self.counters['cache_misses']
+        return dict(
+            self.counters,
+            cache_hit_rate=round(self.counters['cache_hits'] / lookups, 3) if lookups else None,
+            latency_ms=self.latency.to_dict(),
+            prompt_tokens=self.prompt_tokens.to_dict(),
+            response_tokens=self.response_tokens.to_dict(),
+            cost_usd=round(_cost(self.prompt_tokens.sum, self.response_tokens.sum), 6)
+        )
+
+
+class LlmTelemetry:
+    """
+    Rolling statistics of summary generation, by Flask endpoint: upstream
+    calls (latency, prompt/response tokens, failures), circuit breaker
+    rejections, unparsable replies and summary-cache lookups. Kept in
+    SLOT_SECONDS slots covering the last LLM_TELEMETRY_WINDOW seconds.
+
+    Each worker records in memory and a background thread writes its slots
+    to instance/llm_telemetry/<pid>.json every FLUSH_INTERVAL seconds;
+    snapshot() merges the files of every worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = {}  # endpoint -> deque of (slot number, _Stats)
+        self._recent = deque(maxlen=RECENT_CALLS)
+        self._dirty = False
+        self._thread = None
+        self._app = None
+
+    def record_call(self, operation, latency, prompt_tokens, response_tokens, succeeded, attempts=1):
+        """One logical model call (retries included); latency in seconds"""
+        endpoint = _endpoint()
+        with self._lock:
+            stats = self._current(endpoint)
+            stats.counters['calls'] += 1
+            stats.latency.add(latency * 1000)
+            if succeeded:
+                stats.prompt_tokens.add(prompt_tokens)
+                stats.response_tokens.add(response_tokens)
+            else:
+                stats.counters['failures'] += 1
+            self._recent.append({
+                'at': time.time(),
+                'endpoint': endpoint,
+                'operation': operation,
+                'succeeded': succeeded,
+                'attempts': attempts,
+                'latency_ms': round(latency * 1000, 1),
+                'prompt_tokens': prompt_tokens,
+                'response_tokens': response_tokens,
+                'worker': os.getpid()
+            })
+            self._dirty = True
+        self._start()
+
+    def record_rejected(self):
+        self._count('rejected')
+
+    def record_parse_failure(self, count=1):
+        self._count('parse_failures', count)
+
+    def record_cache(self, hit):
+        self._count('cache_hits' if hit else 'cache_misses')
+
+    def snapshot(self):
+        """
+        Window totals per endpoint and overall, plus the slowest and costliest
+        recent calls, across all workers that recorded within the window
+        """
+        self.flush()
+        oldest = self._slot() - self._window_slots() + 1
+        since = time.time() - _setting('LLM_TELEMETRY_WINDOW')
+        merged, recent, workers = {}, [], []
+        for state in self._worker_states(since):
+            workers.append(state['pid'])
+            for endpoint, slots in state['slots'].items():
+                for slot, stats in slots:
+                    if slot >= oldest:
+                        merged.setdefault(endpoint, _Stats()).merge(_Stats.from_state(stats))
+            recent.extend(call for call in state['recent'] if call['at'] >= since)
+
+        total = _Stats()
+        for stats in merged.values():
+            total.merge(stats)
+        for call in recent:
+            call['cost_usd'] = round(_cost(call['prompt_tokens'], call['response_tokens']), 6)
+        return {
+            'window_seconds': _setting('LLM_TELEMETRY_WINDOW'),
+            'workers': sorted(workers),
+            'total': total.to_dict(),
+            'endpoints': {endpoint: stats.to_dict() for endpoint, stats in merged.items()},
+            'slowest_calls': sorted(recent, key=lambda call: -call['latency_ms'])[:TOP_CALLS],
+            'costliest_calls': sorted(recent, key=lambda call: -call['cost_usd'])[:TOP_CALLS]
+        }
+
+    def flush(self):
+        """Write this worker's slots and recent calls to its file under instance/llm_telemetry/"""
+        with self._lock:
+            if not self._dirty:
+                return
+            state = {
+                'pid': os.getpid(),
+                'written_at': time.time(),
+                'slots': {endpoint: [[slot, stats.to_state()] for slot, stats in slots]
+                          for endpoint, slots in self._slots.items()},
+                'recent': list(self._recent)
+            }
+            self._dirty = False
+        path = os.path.join(self._directory(), f"{state['pid']}.json")
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump(state, fh, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def _worker_states(self, since):
+        """Flushed state of every worker that wrote within the window; older files are removed"""
+        directory = self._directory()
+        states = []
+        for name in os.listdir(directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path) as fh:
+                    state = json.load(fh)
+            except (OSError, ValueError):
+                # Removed or replaced while we read it
+                continue
+            if state['written_at'] < since:
+                # A worker that exited or has been idle for the whole window
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            states.append(state)
+        return states
+
+    def _directory(self):
+        app = self._app or current_app
+        directory = os.path.join(app.instance_path, 'llm_telemetry')
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def _start(self):
+        # Started lazily so each gunicorn worker gets its own thread after the fork
+        if self._thread is not None or not has_app_context():
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._run, name='llm-telemetry-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self._flush_quietly)
+
+    def _run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"LLM telemetry flush error: {e}")
+
+    def _count(self, name, n=1):
+        endpoint = _endpoint()
+        with self._lock:
+            self._current(endpoint).counters[name] += n
+            self._dirty = True
+        self._start()
+
+    def _slot(self):
+        return int(time.time() // SLOT_SECONDS)
+
+    def _window_slots(self):
+        return max(int(_setting('LLM_TELEMETRY_WINDOW') // SLOT_SECONDS), 1)
+
+    def _current(self, endpoint):
+        slot = self._slot()
+        slots = self._slots.setdefault(endpoint, deque())
+        if not slots or slots[-1][0] != slot:
+            slots.append((slot, _Stats()))
+        oldest = slot - self._window_slots() + 1
+        while slots[0][0] < oldest:
+            slots.popleft()
+        return slots[-1][1]
+
+
+# Shared per-process recorder (snapshot() covers every worker)
+llm_telemetry = LlmTelemetry()
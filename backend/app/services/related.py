@@ -0,0 +1,361 @@
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from scipy import sparse
+from flask import current_app
+from app import db
+from app.models.article import Article
+from app.models.collection_version import CollectionVersion
+from app.services.text_analysis import analyze_article
+
+# Neighbours precomputed per article (the most the endpoint will return)
+RELATED_TOP_K = 10
+
+# Neighbours scoring below this cosine similarity are not worth showing
+MIN_SIMILARITY = 0.05
+
+# Title terms count more than body terms when computing term frequency
+TITLE_WEIGHT = 3
+
+# Rows multiplied per step when computing all neighbours at build time
+BUILD_BLOCK_SIZE = 256
+
+# Written vectors are kept beside the similarity matrix until there are this many
+# (or a quarter of its rows are outdated); then the matrix is rebuilt from all vectors
+MAX_DELTA_ROWS = 256
+
+
+class RelatedIndex:
+    """
+    L2-normalized TF-IDF vectors over article titles and content, with the
+    top-k most similar articles precomputed for each article.
+
+    Writes update one vector and patch the neighbour lists it affects, so
+    related() is a dictionary lookup. IDF weights of untouched vectors are
+    only recomputed by a full build().
+
+    Similarities are computed against a CSR matrix of all vectors plus a
+    small matrix of the vectors written since it was built; a write marks
+    the article's old row as outdated instead of rebuilding the matrix.
+
+    The first build runs in a background thread; until it finishes the
+    index is not ready() and related() returns no neighbours.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()   # guards _building; the build itself holds _lock
+        self._building = False
+        self._reset()
+
+    def _reset(self):
+        self.vocab = {}                        # term -> column
+        self.df = Counter()                    # column -> number of articles using it
+        self.vectors = {}                      # article_id -> (columns, weights)
+        self.updated = {}                      # article_id -> updated_at of the indexed version
+        self.neighbours = {}                   # article_id -> [(article_id, score), ...] best first
+        self.referrers = defaultdict(set)      # article_id -> articles listing it as a neighbour
+        self.watermark = None                  # newest updated_at seen
+        self.version = None
+        self.last_check = 0.0
+        self._matrix = None                    # CSR matrix of the vectors at the last compaction
+        self._row_ids = None                   # article id per matrix row (-1 for outdated rows)
+        self._rows = {}                        # article_id -> its current matrix row
+        self._outdated = 0                     # matrix rows whose article was rewritten or removed
+        self._delta = {}                       # article_id -> vector written since the last compaction
+        self._delta_matrix = None
+        self._delta_ids = None
+
+    # ------------------------------------------------------------------
+    # Vectors
+    # ------------------------------------------------------------------
+
+    def _term_counts(self, article_id, title, content, updated_at):
+        analysis = analyze_article(article_id, updated_at, title, content)
+        tf = Counter()
+        for term in analysis.title_terms:
+            tf[term] += TITLE_WEIGHT
+        for term in analysis.body_terms:
+            tf[term] += 1
+        return tf
+
+    def _columns(self, tf):
+        columns = []
+        for term in tf:
+            column = self.vocab.get(term)
+            if column is None:
+                column = self.vocab[term] = len(self.vocab)
+            columns.append(column)
+        return np.array(columns, dtype=np.int32)
+
+    def _weigh(self, columns, counts, doc_count):
+        """Sublinear TF times smoothed IDF, L2-normalized"""
+        df = np.array([self.df[column] for column in columns], dtype=np.float32)
+        weights = (1.0 + np.log(counts)) * (np.log((doc_count + 1) / (df + 1)) + 1.0)
+        norm = np.linalg.norm(weights)
+        return weights / norm if norm else weights
+
+    @staticmethod
+    def _csr(vectors, width):
+        """CSR matrix with one row per (columns, weights) vector"""
+        indptr = [0]
+        indices = []
+        data = []
+        for columns, weights in vectors:
+            indices.append(columns)
+            data.append(weights)
+            indptr.append(indptr[-1] + len(columns))
+        return sparse.csr_matrix(
+            (np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+             np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32),
+             np.array(indptr)),
+            shape=(len(vectors), max(width, 1)),
+            dtype=np.float32
+        )
+
+    def _compact(self):
+        """Rebuild the matrix from every current vector"""
+        row_ids = list(self.vectors)
+        self._matrix = self._csr([self.vectors[article_id] for article_id in row_ids], len(self.vocab))
+        self._row_ids = np.array(row_ids, dtype=np.int64)
+        self._rows = {article_id: row for row, article_id in enumerate(row_ids)}
+        self._outdated = 0
+        self._delta = {}
+        self._delta_matrix = self._delta_ids = None
+
+    def _write_row(self, article_id, vector):
+        """Record a new or rewritten vector (None when removed) without rebuilding the matrix"""
+        if self._matrix is None:
+            return
+        row = self._rows.pop(article_id, None)
+        if row is not None:
+            self._row_ids[row] = -1
+            self._outdated += 1
+        if vector is None:
+            self._delta.pop(article_id, None)
+        else:
+            self._delta[article_id] = vector
+        self._delta_matrix = self._delta_ids = None
+
+    def _matrix_rows(self):
+        """Similarity matrix and its row ids (-1 for outdated rows), compacted when the delta grew too large"""
+        if (self._matrix is None or len(self._delta) > MAX_DELTA_ROWS
+                or self._outdated * 4 > self._matrix.shape[0]):
+            self._compact()
+        return self._matrix, self._row_ids
+
+    def _similarities(self, article_id):
+        """Cosine similarity of one article against every indexed article, with their ids"""
+        columns, weights = self.vectors[article_id]
+        matrix, row_ids = self._matrix_rows()
+        vector = np.zeros(max(len(self.vocab), 1), dtype=np.float32)
+        vector[columns] = weights
+        # Terms new since the last compaction have no column in the matrix (nor entries)
+        scores = matrix @ vector[:matrix.shape[1]]
+        if self._delta:
+            if self._delta_matrix is None:
+                self._delta_ids = np.array(list(self._delta), dtype=np.int64)
+                self._delta_matrix = self._csr(list(self._delta.values()), len(self.vocab))
+            scores = np.concatenate([scores, self._delta_matrix @ vector[:self._delta_matrix.shape[1]]])
+            row_ids = np.concatenate([row_ids, self._delta_ids])
+        return np.where(row_ids < 0, 0.0, scores), row_ids
+
+    def _top_k(self, article_id, scores, row_ids):
+        scores = np.where(row_ids == article_id, 0.0, scores)
+        k = min(RELATED_TOP_K, len(scores))
+        if not k:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(int(row_ids[i]), float(scores[i])) for i in best if scores[i] >= MIN_SIMILARITY]
+
+    def _set_neighbours(self, article_id, neighbours):
+        for neighbour_id, _ in self.neighbours.get(article_id, ()):
+            self.referrers[neighbour_id].discard(article_id)
+        self.neighbours[article_id] = neighbours
+        for neighbour_id, _ in neighbours:
+            self.referrers[neighbour_id].add(article_id)
+
+    def _recompute(self, article_id):
+        scores, row_ids = self._similarities(article_id)
+        self._set_neighbours(article_id, self._top_k(article_id, scores, row_ids))
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def add(self, article_id, title, content, updated_at=None):
+        """Index (or re-index) one article and patch the neighbour lists it affects"""
+        if not self.ready():
+            # The build reads it, or its version bump makes the next check sync it
+            return
+        with self._lock:
+            if updated_at is not None and self.updated.get(article_id) == updated_at:
+                return
+
+            tf = self._term_counts(article_id, title, content, updated_at)
+            self._drop_vector(article_id)
+            columns = self._columns(tf)
+            for column in columns:
+                self.df[int(column)] += 1
+            counts = np.array(list(tf.values()), dtype=np.float32)
+            self.vectors[article_id] = (columns, self._weigh(columns, counts, len(self.vectors) + 1))
+            self._write_row(article_id, self.vectors[article_id])
+            self.updated[article_id] = updated_at
+            if updated_at and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+
+            scores, row_ids = self._similarities(article_id)
+            self._set_neighbours(article_id, self._top_k(article_id, scores, row_ids))
+
+            # Lists that held the old version may now rank it differently: recompute those,
+            # and slot the article into any other list it now beats the weakest entry of
+            stale = self.referrers.get(article_id, set()) - {article_id}
+            for other_id, score in zip(row_ids.tolist(), scores.tolist()):
+                if other_id in (article_id, -1) or other_id in stale or score < MIN_SIMILARITY:
+                    continue
+                current = self.neighbours.get(other_id, [])
+                if len(current) < RELATED_TOP_K or score > current[-1][1]:
+                    updated = sorted(current + [(article_id, score)], key=lambda item: -item[1])
+                    self._set_neighbours(other_id, updated[:RELATED_TOP_K])
+            for other_id in stale:
+                self._recompute(other_id)
+
+    def add_article(self, article):
+        self.add(article.id, article.title, article.content, article.updated_at)
+
+    def remove(self, article_id):
+        """Drop an article and refill the neighbour lists that pointed at it"""
+        if not self.ready():
+            return
+        with self._lock:
+            if article_id not in self.vectors:
+                return
+            self._drop_vector(article_id)
+            self.updated.pop(article_id, None)
+            self._set_neighbours(article_id, [])
+            del self.neighbours[article_id]
+            self._write_row(article_id, None)
+            for other_id in self.referrers.pop(article_id, set()):
+                self._recompute(other_id)
+
+    def _drop_vector(self, article_id):
+        vector = self.vectors.pop(article_id, None)
+        if vector is not None:
+            for column in vector[0]:
+                self.df[int(column)] -= 1
+
+    def build(self):
+        """Rebuild every vector and neighbour list from the database"""
+        versions = CollectionVersion.current('articles')
+        rows = db.session.query(
+            Article.id, Article.title, Article.content, Article.updated_at
+        ).yield_per(500)
+
+        with self._lock:
+            self._reset()
+            counts = {}
+            for article_id, title, content, updated_at in rows:
+                tf = self._term_counts(article_id, title, content, updated_at)
+                columns = self._columns(tf)
+                for column in columns:
+                    self.df[int(column)] += 1
+                counts[article_id] = (columns, np.array(list(tf.values()), dtype=np.float32))
+                self.updated[article_id] = updated_at
+                if updated_at and (self.watermark is None or updated_at > self.watermark):
+                    self.watermark = updated_at
+
+            # Weigh once document frequencies are final
+            for article_id, (columns, tf) in counts.items():
+                self.vectors[article_id] = (columns, self._weigh(columns, tf, len(counts)))
+
+            self._compact()
+            matrix, row_ids = self._matrix, self._row_ids
+            for start in range(0, len(row_ids), BUILD_BLOCK_SIZE):
+                block = (matrix[start:start + BUILD_BLOCK_SIZE] @ matrix.T).toarray()
+                for offset, scores in enumerate(block):
+                    article_id = int(row_ids[start + offset])
+                    self._set_neighbours(article_id, self._top_k(article_id, scores, row_ids))
+
+            self.version = versions
+            self.last_check = time.monotonic()
+
+    def sync(self):
+        """Apply changes made by other processes since the last build or sync"""
+        with self._lock:
+            query = db.session.query(Article.id, Article.title, Article.content, Article.updated_at)
+            if self.watermark is not None:
+                # DATETIME has second precision, so re-read the boundary second
+                query = query.filter(Article.updated_at >= self.watermark)
+            for row in query.yield_per(500):
+                self.add(*row)
+
+            current_ids = {article_id for (article_id,) in db.session.query(Article.id)}
+            for article_id in set(self.vectors) - current_ids:
+                self.remove(article_id)
+
+            missing = current_ids - set(self.vectors)
+            if missing:
+                rows = db.session.query(
+                    Article.id, Article.title, Article.content, Article.updated_at
+                ).filter(Article.id.in_(missing))
+                for row in rows:
+                    self.add(*row)
+
+    def _build_in_background(self):
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    self.build()
+                except Exception as e:
+                    print(f"Related index build error: {e}")
+                finally:
+                    self._building = False
+                    db.session.remove()
+
+        threading.Thread(target=run, name='related-build', daemon=True).start()
+
+    def ensure_fresh(self):
+        """
+        Start the build in a background thread on first use; catch up when
+        another worker changed articles
+        """
+        if self.version is None:
+            with self._build_lock:
+                # Claimed here so concurrent requests start only one build
+                start = not self._building
+                self._building = True
+            if start:
+                self._build_in_background()
+            return
+        if time.monotonic() - self.last_check < current_app.config['SEARCH_INDEX_SYNC_INTERVAL']:
+            return
+        self.last_check = time.monotonic()
+        versions = CollectionVersion.current('articles')
+        if versions != self.version:
+            self.sync()
+            self.version = versions
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def ready(self):
+        """Whether the first build has finished"""
+        return self.version is not None
+
+    def related(self, article_id, limit=RELATED_TOP_K):
+        """[(article_id, score), ...] most similar to article_id, best first ([] until ready)"""
+        if not self.ready():
+            # Not waiting on the lock the build holds
+            return []
+        with self._lock:
+            return self.neighbours.get(article_id, [])[:limit]
+
+
+# Shared per-process index
+related_index = RelatedIndex()
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+# Invalidation log is truncated once it grows past this size
+MAX_LOG_BYTES = 1024 * 1024
+
+
+class ResponseCache:
+    """
+    Per-process TTL + LRU cache for serialized API responses.
+
+    Every entry is tagged with surrogate keys (e.g. 'listing', 'article:12',
+    'category:3'); invalidate() drops all entries carrying any of the given keys.
+    Invalidations are also appended to a small log file so the other gunicorn
+    workers drop the same entries on their next lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # cache key -> (expires_at, value, surrogate keys)
+        self._by_surrogate = {}        # surrogate key -> set of cache keys
+        self._log_offset = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        if not current_app.config['RESPONSE_CACHE_ENABLED']:
+            return None
+        self._apply_remote_invalidations()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, surrogate_keys):
+        """Store value under key, tagged with surrogate_keys"""
+        if not current_app.config['RESPONSE_CACHE_ENABLED']:
+            return
+        expires_at = time.monotonic() + current_app.config['RESPONSE_CACHE_TTL']
+        surrogate_keys = frozenset(surrogate_keys)
+
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (expires_at, value, surrogate_keys)
+            for surrogate in surrogate_keys:
+                self._by_surrogate.setdefault(surrogate, set()).add(key)
+            while len(self._entries) > current_app.config['RESPONSE_CACHE_MAX_ENTRIES']:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, *surrogate_keys):
+        """Drop every entry tagged with any of surrogate_keys, in all workers"""
+        self._invalidate_local(surrogate_keys)
+        self._append_log(surrogate_keys)
+
+    def clear(self):
+        """Drop all entries in this process"""
+        with self._lock:
+            self._entries.clear()
+            self._by_surrogate.clear()
+
+    def _invalidate_local(self, surrogate_keys):
+        with self._lock:
+            for surrogate in surrogate_keys:
+                for key in list(self._by_surrogate.get(surrogate, ())):
+                    self._drop(key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for surrogate in entry[2]:
+            keys = self._by_surrogate.get(surrogate)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_surrogate[surrogate]
+
+    # ------------------------------------------------------------------
+    # Cross-worker invalidation log
+    # ------------------------------------------------------------------
+
+    def _log_path(self):
+        return os.path.join(current_app.instance_path, 'response_cache.log')
+
+    def _append_log(self, surrogate_keys):
+        path = self._log_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+                # Readers notice the shrink and clear their whole cache
+                os.truncate(path, 0)
+            with open(path, 'a', encoding='utf-8') as fh:
+                fh.write(' '.join(surrogate_keys) + '\n')
+        except OSError as e:
+            print(f"Response cache log error: {e}")
+
+    def _apply_remote_invalidations(self):
+        path = self._log_path()
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+
+        with self._lock:
+            if self._log_offset is None:
+                # Entries created from now on are newer than everything in the log
+                self._log_offset = size
+                return
+            if size == self._log_offset:
+                return
+            if size < self._log_offset:
+                self.clear()
+                self._log_offset = 0
+            try:
+                with open(path, 'rb') as fh:
+                    fh.seek(self._log_offset)
+                    data = fh.read()
+            except OSError:
+                return
+            # Only consume complete lines
+            consumed = data.rfind(b'\n') + 1
+            self._log_offset += consumed
+            for line in data[:consumed].decode('utf-8').splitlines():
+                self._invalidate_local(line.split())
+
+
+def article_surrogate_keys(item):
+    """Surrogate keys for a serialized article"""
+    keys = {f"article:{item['id']}"}
+    if item.get('category'):
+        keys.add(f"category:{item['category']['id']}")
+    keys.update(f"tag:{tag['id']}" for tag in item.get('tags', ()))
+    return keys
+
+
+# Shared per-process cache
+response_cache = ResponseCache()
@@ -0,0 +1,307 @@
+import math
+import os
+import pickle
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import timezone
+
+from flask import current_app
+from app import db
+from app.models.article import Article
+from app.services.text_analysis import STOPWORDS, analyze_article, stem, tokenize
+
+# Bump when the analyzer changes so stale snapshots are rebuilt instead of loaded
+SNAPSHOT_FORMAT = 2
+
+# Title terms count more than body terms when computing term frequency
+TITLE_WEIGHT = 3
+
+# Maximum number of vocabulary terms the last query word may expand to
+MAX_PREFIX_EXPANSIONS = 20
+
+
+def _naive_utc(value):
+    """Drop timezone info so values compare with the naive DB datetimes"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class SearchIndex:
+    """In-memory inverted index over article title and content with BM25 ranking"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.postings = defaultdict(dict)  # term -> {article_id: weighted tf}
+        self.doc_terms = {}                # article_id -> terms indexed for it
+        self.doc_len = {}                  # article_id -> weighted document length
+        self.doc_meta = {}                 # article_id -> (category_id, published_date)
+        self.total_len = 0
+        self.watermark = None              # newest updated_at seen
+        self.built = False
+        self.last_sync = 0.0
+        self.snapshot_mtime = 0.0
+        self._vocab = None
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def add(self, article_id, title, content, category_id, published_date, updated_at=None):
+        """Index (or re-index) a single article"""
+        analysis = analyze_article(article_id, updated_at, title, content)
+        tf = Counter()
+        for term in analysis.title_terms:
+            tf[term] += TITLE_WEIGHT
+        for term in analysis.body_terms:
+            tf[term] += 1
+
+        with self._lock:
+            self._remove(article_id)
+            for term, freq in tf.items():
+                if term not in self.postings:
+                    self._vocab = None
+                self.postings[term][article_id] = freq
+            length = sum(tf.values())
+            self.doc_terms[article_id] = tuple(tf)
+            self.doc_len[article_id] = length
+            self.doc_meta[article_id] = (category_id, published_date)
+            self.total_len += length
+            if updated_at and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+
+    def add_article(self, article):
+        """Index an Article model instance"""
+        self.add(article.id, article.title, article.content, article.category_id,
+                 article.published_date, article.updated_at)
+
+    def remove(self, article_id):
+        """Drop an article from the index"""
+        with self._lock:
+            self._remove(article_id)
+
+    def _remove(self, article_id):
+        terms = self.doc_terms.pop(article_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(article_id, None)
+                if not docs:
+                    del self.postings[term]
+                    self._vocab = None
+        self.total_len -= self.doc_len.pop(article_id, 0)
+        self.doc_meta.pop(article_id, None)
+
+    def build(self):
+        """Rebuild the whole index from the database"""
+        with self._lock:
+            self._reset()
+            rows = db.session.query(
+                Article.id, Article.title, Article.content, Article.category_id,
+                Article.published_date, Article.updated_at
+            ).yield_per(500)
+            for row in rows:
+                self.add(*row)
+            self.built = True
+            self.last_sync = time.monotonic()
+
+    def sync(self):
+        """Apply changes made by other processes since the last build or sync"""
+        with self._lock:
+            query = db.session.query(
+                Article.id, Article.title, Article.content, Article.category_id,
+                Article.published_date, Article.updated_at
+            )
+            if self.watermark is not None:
+                # DATETIME has second precision, so re-read the boundary second
+                query = query.filter(Article.updated_at >= self.watermark)
+            for row in query.yield_per(500):
+                self.add(*row)
+
+            current_ids = {article_id for (article_id,) in db.session.query(Article.id)}
+            for article_id in set(self.doc_len) - current_ids:
+                self._remove(article_id)
+
+            missing = current_ids - set(self.doc_len)
+            if missing:
+                rows = db.session.query(
+                    Article.id, Article.title, Article.content, Article.category_id,
+                    Article.published_date, Article.updated_at
+                ).filter(Article.id.in_(missing))
+                for row in rows:
+                    self.add(*row)
+
+            self.last_sync = time.monotonic()
+
+    def ensure_fresh(self):
+        """Build the index on first use and periodically catch up with the database"""
+        path = snapshot_path()
+        snapshot_mtime = os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+        if snapshot_mtime > self.snapshot_mtime:
+            try:
+                self.load(path)
+                self.sync()
+                return
+            except ValueError:
+                # Written by an older analyzer; ignore it until the next rebuild
+                self.snapshot_mtime = snapshot_mtime
+                self.built = False
+
+        if not self.built:
+            self.build()
+        elif time.monotonic() - self.last_sync >= current_app.config['SEARCH_INDEX_SYNC_INTERVAL']:
+            self.sync()
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Write the index to disk so workers can start from it"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            state = {
+                'format': SNAPSHOT_FORMAT,
+                'postings': dict(self.postings),
+                'doc_terms': self.doc_terms,
+                'doc_len': self.doc_len,
+                'doc_meta': self.doc_meta,
+                'total_len': self.total_len,
+                'watermark': self.watermark,
+            }
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as fh:
+                pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self.snapshot_mtime = os.path.getmtime(path)
+
+    def load(self, path):
+        """Replace the index with a snapshot written by save()"""
+        with open(path, 'rb') as fh:
+            state = pickle.load(fh)
+        if state.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError('Search index snapshot has an outdated format')
+        with self._lock:
+            self._reset()
+            self.postings.update(state['postings'])
+            self.doc_terms = state['doc_terms']
+            self.doc_len = state['doc_len']
+            self.doc_meta = state['doc_meta']
+            self.total_len = state['total_len']
+            self.watermark = state['watermark']
+            self.built = True
+            self.snapshot_mtime = os.path.getmtime(path)
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def _passes(self, article_id, category_id, date_from, date_to):
+        meta = self.doc_meta.get(article_id)
+        if meta is None:
+            return False
+        cat_id, published = meta
+        if category_id and cat_id != category_id:
+            return False
+        if date_from and published < date_from:
+            return False
+        if date_to and published > date_to:
+            return False
+        return True
+
+    def filter_ranked(self, ranked, category_id=None, date_from=None, date_to=None):
+        """Apply the listing filters to an externally ranked [(article_id, score), ...] list"""
+        date_from = _naive_utc(date_from)
+        date_to = _naive_utc(date_to)
+        with self._lock:
+            return [(article_id, score) for article_id, score in ranked
+                    if self._passes(article_id, category_id, date_from, date_to)]
+
+    def published_date(self, article_id):
+        """Published date recorded for an indexed article"""
+        return self.doc_meta[article_id][1]
+
+    def _expand_prefix(self, prefix):
+        """Vocabulary terms starting with prefix (the word still being typed)"""
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        terms = []
+        i = bisect_left(self._vocab, prefix)
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            terms.append(self._vocab[i])
+            if len(terms) >= MAX_PREFIX_EXPANSIONS:
+                break
+            i += 1
+        return terms
+
+    def search(self, query, category_id=None, date_from=None, date_to=None):
+        """
+        Return [(article_id, score), ...] ordered by BM25 score.
+        Every query word (stemmed, stopwords dropped) must match; the last
+        word also matches as a prefix, both as typed and stemmed.
+        """
+        words = [word for word in tokenize(query) if word not in STOPWORDS]
+        if not words:
+            return []
+        date_from = _naive_utc(date_from)
+        date_to = _naive_utc(date_to)
+
+        with self._lock:
+            doc_count = len(self.doc_len)
+            if not doc_count:
+                return []
+            avg_len = self.total_len / doc_count
+
+            groups = [[stem(word)] for word in words[:-1]]
+            last = words[-1]
+            last_stem = stem(last)
+            groups.append(sorted({last_stem, *self._expand_prefix(last), *self._expand_prefix(last_stem)}))
+
+            # Candidate documents must match every group
+            group_docs = []
+            for group in groups:
+                docs = set()
+                for term in group:
+                    docs.update(self.postings.get(term, ()))
+                if not docs:
+                    return []
+                group_docs.append(docs)
+            group_docs.sort(key=len)
+            candidates = set.intersection(*group_docs)
+
+            scores = {article_id: 0.0 for article_id in candidates
+                      if self._passes(article_id, category_id, date_from, date_to)}
+
+            for group in groups:
+                for term in group:
+                    docs = self.postings.get(term)
+                    if not docs:
+                        continue
+                    df = len(docs)
+                    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                    for article_id in scores.keys() & docs.keys():
+                        freq = docs[article_id]
+                        norm = self.k1 * (1 - self.b + self.b * self.doc_len[article_id] / avg_len)
+                        scores[article_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+def snapshot_path():
+    """Location of the on-disk index snapshot"""
+    return current_app.config.get('SEARCH_INDEX_PATH') or \
+        os.path.join(current_app.instance_path, 'search_index.pkl')
+
+
+# Shared per-process index
+search_index = SearchIndex()
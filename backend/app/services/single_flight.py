@@ -0,0 +1,84 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # Windows development servers run a single process
+    fcntl = None
+
+# Cross-process locks are striped over this many lock files (unrelated keys rarely share one)
+LOCK_STRIPES = 256
+
+# Polling interval while waiting for another process's lock
+POLL_INTERVAL = 0.05
+
+
+class SingleFlight:
+    """
+    Per-key mutual exclusion across threads and gunicorn workers, used to
+    make sure only one caller at a time does the expensive work for a key.
+
+    Callers hold the key, re-check their cache, and only then do the work;
+    everyone queued behind the first holder finds the result already
+    cached. Threads rendezvous on an in-process lock, processes on an
+    flock()ed file in the instance folder.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._keys = {}  # key -> [threading.Lock, number of holders and waiters]
+
+    @contextmanager
+    def hold(self, key, wait):
+        """
+        Context manager yielding True once this caller holds key, or False if
+        it is still held elsewhere after `wait` seconds.
+        """
+        deadline = time.monotonic() + wait
+        with self._lock:
+            entry = self._keys.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        local = entry[0]
+        try:
+            if not local.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                yield False
+                return
+            try:
+                with self._process_lock(key, deadline) as acquired:
+                    yield acquired
+            finally:
+                local.release()
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._keys[key]
+
+    @contextmanager
+    def _process_lock(self, key, deadline):
+        if fcntl is None:
+            yield True
+            return
+        stripe = int(hashlib.sha1(key.encode('utf-8')).hexdigest(), 16) % LOCK_STRIPES
+        directory = os.path.join(current_app.instance_path, f'{self.name}_locks')
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'{stripe}.lock'), 'a+') as fh:
+            while True:
+                try:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(POLL_INTERVAL)
+            try:
+                yield True
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
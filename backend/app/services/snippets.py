@@ -0,0 +1,122 @@
+import html
+
+from sqlalchemy import select
+from app import db
+from app.models.article import Article
+from app.services.text_analysis import STOPWORDS, TOKEN_RE, analysis_cache, analyze_article, normalize, stem, tokenize
+
+# Sentences shown per search hit
+MAX_FRAGMENTS = 2
+
+# Longer sentences are cut to a window of about this many characters around the first match
+FRAGMENT_CHARS = 180
+
+# The last query word also matches as a prefix once it is this long (it may still be typed)
+MIN_PREFIX_LENGTH = 3
+
+
+class QueryMatcher:
+    """Decides whether an analyzed term matches a search query (same rules as the search index)"""
+
+    def __init__(self, query):
+        words = [word for word in tokenize(query) if word not in STOPWORDS]
+        self.terms = {stem(word) for word in words}
+        self.prefixes = ()
+        if words and len(words[-1]) >= MIN_PREFIX_LENGTH:
+            self.prefixes = (words[-1], stem(words[-1]))
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def matches(self, term):
+        return term in self.terms or any(term.startswith(prefix) for prefix in self.prefixes)
+
+
+def _highlight(sentence, matcher):
+    """HTML-escape a sentence, wrapping matched words in <mark>; returns (html, first match offset)"""
+    parts = []
+    position = 0
+    first = None
+    for match in TOKEN_RE.finditer(sentence):
+        token = normalize(match.group())
+        if not matcher.matches(stem(token)) and not matcher.matches(token):
+            continue
+        if first is None:
+            first = match.start()
+        parts.append(html.escape(sentence[position:match.start()]))
+        parts.append('<mark>' + html.escape(match.group()) + '</mark>')
+        position = match.end()
+    parts.append(html.escape(sentence[position:]))
+    return parts, first
+
+
+def _fragment(sentence, matcher):
+    """Highlighted fragment of a sentence, trimmed around its first match"""
+    if len(sentence) > FRAGMENT_CHARS:
+        _, first = _highlight(sentence, matcher)
+        start = max(0, (first or 0) - FRAGMENT_CHARS // 3)
+        end = min(len(sentence), start + FRAGMENT_CHARS)
+        # Do not cut words in half
+        if start > 0:
+            space = sentence.find(' ', start)
+            start = space + 1 if 0 <= space < end else start
+        if end < len(sentence):
+            space = sentence.rfind(' ', start, end)
+            end = space if space > start else end
+        trimmed = sentence[start:end]
+        parts, _ = _highlight(trimmed, matcher)
+        return ('… ' if start > 0 else '') + ''.join(parts) + (' …' if end < len(sentence) else '')
+    parts, _ = _highlight(sentence, matcher)
+    return ''.join(parts)
+
+
+def article_snippets(analysis, matcher):
+    """Up to MAX_FRAGMENTS highlighted sentences, best covering the query, in reading order"""
+    scored = []
+    for index, terms in enumerate(analysis.sentence_terms):
+        matched = {term for term in terms if matcher.matches(term)}
+        if matched:
+            scored.append((len(matched), index))
+
+    best = []
+    seen = set()
+    for _, index in sorted(scored, key=lambda item: (-item[0], item[1])):
+        # Repeated sentences (boilerplate, pasted paragraphs) are shown once
+        if analysis.sentences[index] not in seen:
+            seen.add(analysis.sentences[index])
+            best.append(index)
+            if len(best) == MAX_FRAGMENTS:
+                break
+    return [_fragment(analysis.sentences[index], matcher) for index in sorted(best)]
+
+
+def snippets_for(articles, query):
+    """
+    {article_id: [fragment, ...]} for search hits (list items with id and
+    updated_at). Sentences come from the shared analysis cache, filled when
+    the search index is built; content is only read, for this page, for
+    versions no longer cached.
+    """
+    matcher = QueryMatcher(query)
+    if not matcher:
+        return {article.id: [] for article in articles}
+
+    analyses = {}
+    missing = []
+    for article in articles:
+        analysis = analysis_cache.peek(article.id, article.updated_at)
+        if analysis is None:
+            missing.append(article.id)
+        else:
+            analyses[article.id] = analysis
+
+    if missing:
+        rows = db.session.execute(
+            select(Article.id, Article.title, Article.content, Article.updated_at)
+            .where(Article.id.in_(missing))
+        )
+        for article_id, title, content, updated_at in rows:
+            analyses[article_id] = analyze_article(article_id, updated_at, title, content)
+
+    return {article.id: article_snippets(analyses[article.id], matcher) if article.id in analyses else []
+            for article in articles}
@@ -0,0 +1,298 @@
+import math
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.article import Article
+from app.models.category import Category
+from app.models.collection_version import CollectionVersion
+from app.models.tag import Tag
+from app.services.text_analysis import tokenize
+from app.services.views import trending_scores
+
+# Largest `limit` the endpoint accepts
+MAX_SUGGESTIONS = 20
+
+# Prefixes this short match much of the vocabulary; their top results are memoized
+SHORT_PREFIX_LENGTH = 2
+
+# Most index entries examined for one longer prefix
+MAX_SCAN = 500
+
+# Article recency halves every this many days
+RECENCY_HALF_LIFE_DAYS = 7
+
+# Popularity (views, article counts) is re-read in the background this often
+WEIGHT_REFRESH_INTERVAL = 600  # seconds
+
+
+def suggest_key(text):
+    """Normalized form used for prefix matching"""
+    return ' '.join(tokenize(text))
+
+
+class SuggestIndex:
+    """
+    Sorted array of (key, kind, id) over article titles, tag names and
+    category names, searched with bisect. Each title is indexed from every
+    word so a prefix matches mid-title words too. Only titles are read,
+    never content.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.entries = []          # sorted [(key, kind, id), ...]
+        self.labels = {}           # (kind, id) -> (text, slug)
+        self.weights = {}          # (kind, id) -> ranking weight
+        self.published = {}        # article id -> published_date
+        self.popularity = {}       # article id -> decayed view score
+        self.max_popularity = 0.0
+        self.max_count = 1
+        self._short = {}           # memoized short-prefix results
+        self.version = None
+        self.last_check = 0.0
+        self.weighed_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Weights
+    # ------------------------------------------------------------------
+
+    def _article_weight(self, article_id):
+        """Recency and popularity, each in [0, 1]"""
+        published = self.published.get(article_id)
+        recency = 0.0
+        if published is not None:
+            age_days = max((datetime.utcnow() - published).total_seconds() / 86400, 0.0)
+            recency = math.pow(0.5, age_days / RECENCY_HALF_LIFE_DAYS)
+        popularity = 0.0
+        if self.max_popularity:
+            popularity = math.log1p(self.popularity.get(article_id, 0.0)) / math.log1p(self.max_popularity)
+        return recency + popularity
+
+    def _group_weight(self, article_count):
+        """Tags and categories rank above single articles, larger ones first"""
+        return 1.0 + math.log1p(article_count) / math.log1p(self.max_count)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _entries_for(self, kind, item_id, text, slug, weight):
+        """Register labels/weight and return the index entries for one item"""
+        words = suggest_key(text).split()
+        if not words:
+            return []
+        self.labels[(kind, item_id)] = (text, slug)
+        self.weights[(kind, item_id)] = weight
+        starts = range(len(words)) if kind == 'article' else (0,)
+        return [(' '.join(words[start:]), kind, item_id) for start in starts]
+
+    def _add(self, kind, item_id, text, slug=None, weight=0.0):
+        for entry in self._entries_for(kind, item_id, text, slug, weight):
+            insort(self.entries, entry)
+            self._forget_short(entry[0])
+
+    def _remove(self, kind, item_id):
+        ref = (kind, item_id)
+        label = self.labels.pop(ref, None)
+        self.weights.pop(ref, None)
+        if label is None:
+            return
+        words = suggest_key(label[0]).split()
+        starts = range(len(words)) if kind == 'article' else (0,)
+        for start in starts:
+            entry = (' '.join(words[start:]), kind, item_id)
+            position = bisect_left(self.entries, entry)
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+                self._forget_short(entry[0])
+
+    def _forget_short(self, key):
+        for length in range(1, SHORT_PREFIX_LENGTH + 1):
+            self._short.pop(key[:length], None)
+
+    def add_article(self, article_id, title, published_date):
+        with self._lock:
+            self._remove('article', article_id)
+            self.published[article_id] = published_date
+            self._add('article', article_id, title, weight=self._article_weight(article_id))
+
+    def remove_article(self, article_id):
+        with self._lock:
+            self._remove('article', article_id)
+            self.published.pop(article_id, None)
+
+    def set_tag(self, tag_id, name, slug, article_count=0):
+        with self._lock:
+            self._remove('tag', tag_id)
+            self._add('tag', tag_id, name, slug, self._group_weight(article_count))
+
+    def remove_tag(self, tag_id):
+        with self._lock:
+            self._remove('tag', tag_id)
+
+    def set_category(self, category_id, name, slug, article_count=0):
+        with self._lock:
+            self._remove('category', category_id)
+            self._add('category', category_id, name, slug, self._group_weight(article_count))
+
+    def remove_category(self, category_id):
+        with self._lock:
+            self._remove('category', category_id)
+
+    def build(self):
+        """Rebuild from titles, tag and category names and the current view scores"""
+        versions = CollectionVersion.current('articles', 'categories', 'tags')
+        articles = db.session.execute(select(Article.id, Article.title, Article.published_date)).all()
+        tags = db.session.execute(select(Tag.id, Tag.name, Tag.slug, Tag.article_count)).all()
+        categories = db.session.execute(
+            select(Category.id, Category.name, Category.slug, Category.article_count)
+        ).all()
+        popularity = dict(trending_scores(top_n=None))
+
+        with self._lock:
+            self._reset()
+            self.popularity = popularity
+            self.max_popularity = max(popularity.values(), default=0.0)
+            self.max_count = max([row.article_count for row in tags + categories] + [1])
+
+            entries = []
+            for article_id, title, published_date in articles:
+                self.published[article_id] = published_date
+                entries.extend(self._entries_for('article', article_id, title, None,
+                                                 self._article_weight(article_id)))
+            for tag_id, name, slug, count in tags:
+                entries.extend(self._entries_for('tag', tag_id, name, slug, self._group_weight(count)))
+            for category_id, name, slug, count in categories:
+                entries.extend(self._entries_for('category', category_id, name, slug,
+                                                 self._group_weight(count)))
+            entries.sort()
+            self.entries = entries
+
+            self.version = versions
+            self.last_check = self.weighed_at = time.monotonic()
+
+    def reweigh(self):
+        """Recompute ranking weights from current view scores and article counts (titles are not re-read)"""
+        popularity = dict(trending_scores(top_n=None))
+        counts = {('tag', tag_id): count
+                  for tag_id, count in db.session.execute(select(Tag.id, Tag.article_count))}
+        counts.update((('category', category_id), count)
+                      for category_id, count in db.session.execute(select(Category.id, Category.article_count)))
+
+        with self._lock:
+            self.popularity = popularity
+            self.max_popularity = max(popularity.values(), default=0.0)
+            self.max_count = max(list(counts.values()) + [1])
+            for ref in self.weights:
+                kind, item_id = ref
+                if kind == 'article':
+                    self.weights[ref] = self._article_weight(item_id)
+                elif ref in counts:
+                    self.weights[ref] = self._group_weight(counts[ref])
+            self._short.clear()
+            self.weighed_at = time.monotonic()
+
+    def _reweigh_in_background(self):
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    self.reweigh()
+                except Exception as e:
+                    print(f"Suggest weight refresh error: {e}")
+                finally:
+                    db.session.remove()
+
+        threading.Thread(target=run, name='suggest-reweigh', daemon=True).start()
+
+    def note_write(self, name):
+        """
+        Adopt the version bump of a write this worker committed and already
+        patched in, so the next check does not rebuild for it
+        """
+        known = self.version
+        if known is None:
+            return
+        current = CollectionVersion.advanced(known, name)
+        with self._lock:
+            if current is not None and self.version is known:
+                self.version = current
+
+    def ensure_fresh(self):
+        """
+        Build on first use; rebuild when another worker wrote. Stale weights
+        are refreshed in a background thread while the current ones keep serving.
+        """
+        if self.version is None:
+            self.build()
+            return
+        now = time.monotonic()
+        with self._lock:
+            reweigh = now - self.weighed_at >= WEIGHT_REFRESH_INTERVAL
+            if reweigh:
+                # Claimed here so concurrent requests start only one refresh
+                self.weighed_at = now
+        if reweigh:
+            self._reweigh_in_background()
+        if now - self.last_check < current_app.config['SEARCH_INDEX_SYNC_INTERVAL']:
+            return
+        self.last_check = now
+        if CollectionVersion.current('articles', 'categories', 'tags') != self.version:
+            self.build()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def suggest(self, query, limit=8):
+        """[{'type', 'id', 'text', 'slug'}, ...] whose normalized text has a word starting with query"""
+        prefix = suggest_key(query)
+        if not prefix:
+            return []
+        # Keep a trailing space so "bank " only matches the whole word
+        if query[-1:].isspace():
+            prefix += ' '
+
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX_LENGTH:
+                ranked = self._short.get(prefix)
+                if ranked is None:
+                    ranked = self._short[prefix] = self._rank(prefix, scan=None)
+            else:
+                ranked = self._rank(prefix, scan=MAX_SCAN)
+
+            results = []
+            for kind, item_id in ranked[:limit]:
+                text, slug = self.labels[(kind, item_id)]
+                result = {'type': kind, 'id': item_id, 'text': text}
+                if slug:
+                    result['slug'] = slug
+                results.append(result)
+            return results
+
+    def _rank(self, prefix, scan):
+        """Distinct refs under prefix, best weight first (kept to the endpoint maximum)"""
+        refs = set()
+        position = bisect_left(self.entries, (prefix,))
+        end = len(self.entries) if scan is None else min(position + scan, len(self.entries))
+        while position < end:
+            key, kind, item_id = self.entries[position]
+            if not key.startswith(prefix):
+                break
+            refs.add((kind, item_id))
+            position += 1
+        ranked = sorted(refs, key=lambda ref: (-self.weights.get(ref, 0.0), ref[0], ref[1]))
+        return ranked[:MAX_SUGGESTIONS]
+
+
+# Shared per-process index
+suggest_index = SuggestIndex()
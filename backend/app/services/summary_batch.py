@@ -0,0 +1,77 @@
+from flask import current_app
+from app.services.ai_summary import (SummaryError, estimate_tokens, prompt_excerpt,
+                                     request_batch_summaries, fallback_summary)
+from app.services.summary_store import summary_store
+
+# Prompt tokens besides the articles themselves (instructions, JSON template)
+PROMPT_OVERHEAD_TOKENS = 300
+
+# Per-article framing inside a batch prompt ("Article ID ...", quotes)
+ARTICLE_OVERHEAD_TOKENS = 10
+
+
+def pack(items, filters, token_budget, max_items):
+    """
+    Split [(item_id, content), ...] into consecutive batches whose estimated
+    prompt size stays within token_budget and which hold at most max_items
+    articles. An article too large for the budget on its own gets its own batch.
+    """
+    batches, batch, used = [], [], PROMPT_OVERHEAD_TOKENS
+    for item_id, content in items:
+        cost = estimate_tokens(prompt_excerpt(content, filters)) + ARTICLE_OVERHEAD_TOKENS
+        if batch and (used + cost > token_budget or len(batch) >= max_items):
+            batches.append(batch)
+            batch, used = [], PROMPT_OVERHEAD_TOKENS
+        batch.append((item_id, content))
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def summarize_batch(articles, filters, length='medium'):
+    """
+    Summaries for [(article_id, content), ...], several articles per model call.
+    Returns {article_id: (summary, status)} with status 'cached', 'generated'
+    or 'failed'. Stored summaries are reused; items missing from a reply (or
+    in a batch whose call failed) are retried, in smaller batches, up to
+    SUMMARY_BATCH_ATTEMPTS times and otherwise get the fallback sections.
+    """
+    config = current_app.config
+    results = {}
+    todo = []
+    for article_id, content in articles:
+        # Not counted: the batch route already counted it, and CLI runs are not traffic
+        summary = summary_store.get(content, filters, length, record=False)
+        if summary is None:
+            todo.append((article_id, content))
+        else:
+            results[article_id] = (summary, 'cached')
+
+    max_items = config['SUMMARY_BATCH_MAX_ITEMS']
+    error = SummaryError('Summary missing from the batch reply')
+    for _ in range(config['SUMMARY_BATCH_ATTEMPTS']):
+        if not todo:
+            break
+        failed = []
+        for batch in pack(todo, filters, config['SUMMARY_BATCH_TOKENS'], max_items):
+            try:
+                summaries = request_batch_summaries(batch, filters, length)
+            except SummaryError as e:
+                print(f"Gemini API Error: {e}")
+                error = e
+                summaries = {}
+            for article_id, content in batch:
+                summary = summaries.get(article_id)
+                if summary is None:
+                    failed.append((article_id, content))
+                    continue
+                summary_store.put(content, filters, length, summary, article_id)
+                results[article_id] = (summary, 'generated')
+        todo = failed
+        # A reply that keeps dropping items is often choking on one of them; isolate it
+        max_items = max(1, max_items // 2)
+
+    for article_id, content in todo:
+        results[article_id] = (fallback_summary(filters, error, content, length), 'failed')
+    return results
@@ -0,0 +1,187 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.article import Article
+from app.models.summary_job import SummaryJob
+from app.services.ai_summary import DEFAULT_FILTERS, SummaryError, missing_sections, request_summary
+from app.services.summary_batch import summarize_batch
+from app.services.summary_store import summary_store, summary_flight, content_key, end_snapshot
+
+# Pre-generated summaries cover every section at this length
+DEFAULT_LENGTH = 'medium'
+
+
+class SummaryJobQueue:
+    """
+    Per-process background summary generation with bounded concurrency.
+
+    Each job is also recorded in summary_jobs so every worker can tell a
+    reader that the summary is on its way instead of starting its own
+    generation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._app = None
+        self._queued = 0
+
+    def enqueue(self, article_id, content):
+        """Schedule the default summary for this content unless it is stored or already queued"""
+        if not current_app.config['SUMMARY_PREGENERATE']:
+            return False
+        if summary_store.get(content, DEFAULT_FILTERS, DEFAULT_LENGTH, record=False) is not None:
+            return False
+        if not self._reserve(1):
+            # Readers will trigger an on-demand generation instead
+            return False
+
+        key = content_key(content, DEFAULT_LENGTH)
+        if not self._claim(key, article_id):
+            self._release(1)
+            return False
+        self._executor.submit(self._run, article_id, key)
+        return True
+
+    def enqueue_batch(self, articles, filters, length):
+        """
+        Schedule summaries of [(article_id, content), ...] at the given filters
+        and length, SUMMARY_BATCH_MAX_ITEMS articles per job. Articles whose
+        content already has a job in flight are left to it. Returns False
+        when the queue has no room for the whole batch.
+        """
+        size = current_app.config['SUMMARY_BATCH_MAX_ITEMS']
+        jobs = -(-len(articles) // size)
+        if not self._reserve(jobs):
+            return False
+
+        claimed = [(article_id, content) for article_id, content in articles
+                   if self._claim(content_key(content, length), article_id)]
+        chunks = [claimed[start:start + size] for start in range(0, len(claimed), size)]
+        self._release(jobs - len(chunks))
+        for chunk in chunks:
+            self._executor.submit(self._run_batch, chunk, filters, length)
+        return True
+
+    def _reserve(self, jobs):
+        """Take queue room for `jobs` jobs, starting the executor on first use; False when full"""
+        with self._lock:
+            if self._queued + jobs > current_app.config['SUMMARY_QUEUE_MAX']:
+                return False
+            self._queued += jobs
+            if self._executor is None:
+                self._app = current_app._get_current_object()
+                self._executor = ThreadPoolExecutor(max_workers=current_app.config['SUMMARY_WORKERS'],
+                                                    thread_name_prefix='summary-job')
+            return True
+
+    def _release(self, jobs):
+        with self._lock:
+            self._queued -= jobs
+
+    def _claim(self, key, article_id):
+        """Record the job; False when another worker already has it in flight"""
+        try:
+            db.session.execute(delete(SummaryJob).where(
+                SummaryJob.content_key == key,
+                (SummaryJob.status == 'failed') | (SummaryJob.created_at < _stale_before())
+            ))
+            db.session.add(SummaryJob(content_key=key, article_id=article_id))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        except Exception as e:
+            # Pre-generation is best effort; never fail the article write over it
+            print(f"Could not queue summary job for article {article_id}: {e}")
+            db.session.rollback()
+            return False
+
+    def _run(self, article_id, key):
+        with self._app.app_context():
+            try:
+                content = db.session.execute(
+                    select(Article.content).where(Article.id == article_id)
+                ).scalar()
+                # Skip articles deleted or edited again since the job was queued
+                if content is not None and content_key(content, DEFAULT_LENGTH) == key:
+                    # Let an on-demand generation of the same content finish first; it may cover us
+                    with summary_flight.hold(key, self._app.config['SUMMARY_JOB_TIMEOUT']) as held:
+                        if not held:
+                            # Whoever still holds it will store the summary; don't generate a second copy
+                            print(f"Summary job for article {article_id} skipped: generation already in flight")
+                        else:
+                            end_snapshot()
+                            if summary_store.get(content, DEFAULT_FILTERS, DEFAULT_LENGTH, record=False) is None:
+                                summary = request_summary(content, list(DEFAULT_FILTERS), DEFAULT_LENGTH)
+                                missing = missing_sections(summary, DEFAULT_FILTERS)
+                                if missing:
+                                    raise SummaryError(f"Sections missing from the reply: {', '.join(missing)}")
+                                summary_store.put(content, DEFAULT_FILTERS, DEFAULT_LENGTH, summary, article_id)
+                db.session.execute(delete(SummaryJob).where(SummaryJob.content_key == key))
+                db.session.commit()
+            except Exception as e:
+                print(f"Summary job for article {article_id} failed: {e}")
+                db.session.rollback()
+                _mark_failed(key, str(e))
+            finally:
+                db.session.remove()
+                self._release(1)
+
+    def _run_batch(self, articles, filters, length):
+        keys = {article_id: content_key(content, length) for article_id, content in articles}
+        with self._app.app_context():
+            try:
+                results = summarize_batch(articles, filters, length)
+                failed = [keys[article_id] for article_id, (_, status) in results.items() if status == 'failed']
+                done = set(keys.values()) - set(failed)
+                if done:
+                    db.session.execute(delete(SummaryJob).where(SummaryJob.content_key.in_(done)))
+                    db.session.commit()
+                for key in failed:
+                    _mark_failed(key, 'Summary generation failed')
+            except Exception as e:
+                print(f"Batch summary job for articles {list(keys)} failed: {e}")
+                db.session.rollback()
+                for key in keys.values():
+                    _mark_failed(key, str(e))
+            finally:
+                db.session.remove()
+                self._release(1)
+
+
+def _stale_before():
+    return datetime.utcnow() - timedelta(seconds=current_app.config['SUMMARY_JOB_TIMEOUT'])
+
+
+def _mark_failed(key, error):
+    db.session.execute(
+        SummaryJob.__table__.update().where(SummaryJob.content_key == key)
+        .values(status='failed', error=error[:255])
+    )
+    db.session.commit()
+
+
+def job_status(content, length):
+    """'pending' or 'failed' for a background job on this content and length within SUMMARY_JOB_TIMEOUT, else None"""
+    return db.session.execute(
+        select(SummaryJob.status).where(
+            SummaryJob.content_key == content_key(content, length),
+            SummaryJob.created_at >= _stale_before()
+        )
+    ).scalar()
+
+
+def is_pending(content, length):
+    """Whether a background job is currently generating the summary for this content and length"""
+    return job_status(content, length) == 'pending'
+
+
+# Shared per-process queue
+summary_jobs = SummaryJobQueue()
@@ -0,0 +1,310 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from datetime import datetime
+
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.summary_cache import SummaryCacheEntry
+from app.services.ai_summary import (MODEL_NAME, PROMPT_VERSION, SummaryError, request_summary, stream_summary,
+                                     fallback_summary, missing_sections)
+from app.services.single_flight import SingleFlight
+from app.services.llm_telemetry import llm_telemetry
+from app.services.text_analysis import clean_text
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def content_key(content, length, model=MODEL_NAME, prompt_version=PROMPT_VERSION):
+    """
+    Hash of everything that determines a summary except the filters.
+    Content is hashed as the prompt sees it, so whitespace-only edits keep their summaries.
+    """
+    return _digest(clean_text(content), length, model, prompt_version)
+
+
+def summary_key(content, filters, length, model=MODEL_NAME, prompt_version=PROMPT_VERSION):
+    """Content address of one summary"""
+    return _digest(clean_text(content), sorted(set(filters)), length, model, prompt_version)
+
+
+def same_summary_input(old_content, new_content):
+    """Whether an edit leaves the text the summarizer sees unchanged"""
+    return clean_text(old_content) == clean_text(new_content)
+
+
+def _subset(summary, filters):
+    """The requested sections of a cached summary, or None if any is missing"""
+    if not all(f in summary for f in filters):
+        return None
+    return {f: summary[f] for f in filters}
+
+
+class SummaryStore:
+    """
+    Two-tier summary cache: a per-process LRU in front of the summary_cache
+    table. Entries are content-addressed, so an edited article simply
+    stops matching its old entries; a request for a subset of the filters
+    of a stored summary is answered from it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # content key -> {sorted filters tuple: summary}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content, filters, length, record=True):
+        """Cached summary covering filters, or None (`record=False` leaves hit/miss counters alone)"""
+        ckey = content_key(content, length)
+        with self._lock:
+            summary = self._lookup_local(ckey, filters)
+            if summary is not None:
+                self.hits += record
+        if summary is not None:
+            if record:
+                llm_telemetry.record_cache(True)
+            return summary
+
+        self._load(ckey)
+        with self._lock:
+            summary = self._lookup_local(ckey, filters)
+            if summary is None:
+                self.misses += record
+            else:
+                self.hits += record
+        if record:
+            llm_telemetry.record_cache(summary is not None)
+        return summary
+
+    def sections(self, content, filters, length, record=True):
+        """Whichever of the requested sections are cached, combined across stored variants"""
+        ckey = content_key(content, length)
+        with self._lock:
+            found = self._sections_local(ckey, filters)
+        if len(found) < len(filters):
+            self._load(ckey)
+            with self._lock:
+                found = self._sections_local(ckey, filters)
+        with self._lock:
+            if len(found) == len(filters):
+                self.hits += record
+            else:
+                self.misses += record
+        if record:
+            llm_telemetry.record_cache(len(found) == len(filters))
+        return found
+
+    def put(self, content, filters, length, summary, article_id=None):
+        """
+        Store a freshly generated summary covering every filter. Summaries of
+        articles go to both tiers; those of ad-hoc content (no article_id)
+        only to the in-process LRU, so arbitrary request bodies never pile
+        up in the table.
+        """
+        with self._lock:
+            self._remember(content_key(content, length), filters, summary)
+        if article_id is None:
+            return
+
+        key = summary_key(content, filters, length)
+        entry = SummaryCacheEntry(
+            key=key,
+            content_key=content_key(content, length),
+            article_id=article_id,
+            filters=','.join(sorted(set(filters))),
+            length=length,
+            model=MODEL_NAME,
+            prompt_version=PROMPT_VERSION,
+            summary=json.dumps(summary, ensure_ascii=False)
+        )
+        try:
+            db.session.merge(entry)
+            db.session.commit()
+        except IntegrityError:
+            # Another worker inserted the same key between our read and write; keep ours
+            db.session.rollback()
+            db.session.execute(
+                update(SummaryCacheEntry).where(SummaryCacheEntry.key == key)
+                .values(summary=entry.summary, article_id=article_id, created_at=datetime.utcnow())
+            )
+            db.session.commit()
+
+    def invalidate_article(self, article_id):
+        """Delete an article's stored summaries (caller commits)"""
+        db.session.execute(delete(SummaryCacheEntry).where(SummaryCacheEntry.article_id == article_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup_local(self, ckey, filters):
+        variants = self._entries.get(ckey)
+        if not variants:
+            return None
+        self._entries.move_to_end(ckey)
+        wanted = set(filters)
+        # Prefer the smallest stored variant that covers the request
+        for stored_filters in sorted(variants, key=len):
+            if wanted <= set(stored_filters):
+                summary = _subset(variants[stored_filters], filters)
+                if summary is not None:
+                    return summary
+        return None
+
+    def _sections_local(self, ckey, filters):
+        variants = self._entries.get(ckey)
+        if not variants:
+            return {}
+        self._entries.move_to_end(ckey)
+        found = {}
+        for summary in variants.values():
+            for f in filters:
+                if f in summary and f not in found:
+                    found[f] = summary[f]
+        return found
+
+    def _load(self, ckey):
+        """Pull every stored variant of ckey from the database into the local tier"""
+        rows = db.session.execute(
+            select(SummaryCacheEntry.filters, SummaryCacheEntry.summary)
+            .where(SummaryCacheEntry.content_key == ckey)
+        ).all()
+        with self._lock:
+            for stored_filters, stored in rows:
+                self._remember(ckey, stored_filters.split(','), json.loads(stored))
+
+    def _remember(self, ckey, filters, summary):
+        self._entries.setdefault(ckey, {})[tuple(sorted(set(filters)))] = summary
+        self._entries.move_to_end(ckey)
+        while len(self._entries) > current_app.config['SUMMARY_CACHE_MAX_ENTRIES']:
+            self._entries.popitem(last=False)
+
+
+# Shared per-process store
+summary_store = SummaryStore()
+
+# Generations of one content key (any filters) run one at a time across threads and workers
+summary_flight = SingleFlight('summary')
+
+
+def end_snapshot():
+    """
+    End the session's transaction so the next read sees rows other workers
+    committed since it began (MySQL's REPEATABLE READ keeps reading the
+    snapshot taken by the transaction's first query). Call after acquiring
+    summary_flight, before re-checking the store.
+    """
+    db.session.commit()
+
+
+def coalesce_wait():
+    """
+    Seconds a request waits on another one generating the same content:
+    the holder's whole Gemini call (GEMINI_DEADLINE) plus
+    SUMMARY_COALESCE_WAIT to parse and store the reply, so a waiter only
+    gives up on a holder that is past its own deadline.
+    """
+    return current_app.config['GEMINI_DEADLINE'] + current_app.config['SUMMARY_COALESCE_WAIT']
+
+
+def summarize(content, filters, length='medium', article_id=None, pending=None):
+    """
+    Summary for content, from the store when possible.
+    Returns (summary, cached); failed generations are not stored. When
+    `pending()` says a background job is already producing it, or another
+    request is still generating this content after coalesce_wait()
+    seconds, returns (None, False) instead of generating a second copy.
+    """
+    summary = summary_store.get(content, filters, length)
+    if summary is not None:
+        return summary, True
+    if pending is not None and pending():
+        return None, False
+
+    with summary_flight.hold(content_key(content, length), coalesce_wait()) as held:
+        if not held:
+            return None, False
+        # The previous holder may have just stored what we need
+        end_snapshot()
+        summary = summary_store.get(content, filters, length, record=False)
+        if summary is not None:
+            return summary, True
+
+        try:
+            summary = request_summary(content, filters, length)
+        except SummaryError as e:
+            print(f"Gemini API Error: {e}")
+            return fallback_summary(filters, e, content, length), False
+
+        missing = missing_sections(summary, filters)
+        if missing:
+            # Incomplete replies are not stored; the missing sections get fallback text
+            summary.update(fallback_summary(missing, SummaryError('Sections missing from the reply'),
+                                            content, length))
+            return {f: summary[f] for f in filters}, False
+        summary_store.put(content, filters, length, summary, article_id)
+    return summary, False
+
+
+def summarize_stream(content, filters, length='medium', article_id=None, pending=None):
+    """
+    Summary sections as they become available, as (event, data) pairs:
+    a 'section' event ({'filter', 'text', 'source'}) per filter, cached
+    sections first, then the rest as Gemini streams them (or fallback text
+    for sections it failed to deliver), then 'done'. Yields a single
+    'pending' event instead when a background job or another request is
+    already generating the missing sections.
+    """
+    found = summary_store.sections(content, filters, length)
+    for f in filters:
+        if f in found:
+            yield 'section', {'filter': f, 'text': found[f], 'source': 'cache'}
+    missing = [f for f in filters if f not in found]
+    if not missing:
+        yield 'done', {'cached': True}
+        return
+    if pending is not None and pending():
+        yield 'pending', {}
+        return
+
+    with summary_flight.hold(content_key(content, length), coalesce_wait()) as held:
+        if not held:
+            yield 'pending', {}
+            return
+        # The previous holder may have just stored some of them
+        end_snapshot()
+        stored = summary_store.sections(content, missing, length, record=False)
+        for f in missing:
+            if f in stored:
+                found[f] = stored[f]
+                yield 'section', {'filter': f, 'text': stored[f], 'source': 'cache'}
+        missing = [f for f in missing if f not in stored]
+
+        generated = {}
+        error = SummaryError('Sections missing from the reply')
+        if missing:
+            try:
+                for f, text in stream_summary(content, missing, length):
+                    generated[f] = text
+                    yield 'section', {'filter': f, 'text': text, 'source': 'model'}
+            except SummaryError as e:
+                print(f"Gemini API Error: {e}")
+                error = e
+
+        if generated:
+            # Stored as one variant covering every section we now have
+            covered = dict(found, **generated)
+            summary_store.put(content, list(covered), length, covered, article_id)
+        rest = [f for f in missing if f not in generated]
+        if rest:
+            fallback = fallback_summary(rest, error, content, length)
+            for f in rest:
+                yield 'section', {'filter': f, 'text': fallback.get(f, ''), 'source': 'fallback'}
+    yield 'done', {'cached': not generated and not rest}
@@ -0,0 +1,183 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])|\n\s*\n')
+WHITESPACE_RE = re.compile(r'[ \t\r\f\v]+')
+
+# Common Indonesian function words that carry no search or scoring value
+STOPWORDS = frozenset("""
+ada adalah adanya agar akan akhirnya aku amat anda antara apa apabila apakah
+atas atau bagai bagaimana bagi bahkan bahwa baik banyak baru beberapa begini
+begitu belum benar berbagai berikut bersama besar bisa boleh bukan cara cukup
+dalam dan dapat dari daripada demikian dengan di dia diri dirinya dua hal
+hampir hanya harus hingga ia ialah ini itu jadi jika juga jumlah justru kalau
+kami kamu kan karena ke kecil kembali kemudian kepada ketika kita lagi lain
+lalu lama lebih maka mampu mana masih masing mau melalui memang mereka meski
+mungkin namun nanti oleh pada padahal para per perlu pernah pula pun saat
+saja sama sampai sangat satu saya se seakan sebab sebagai sebelum sebuah
+sedang sedangkan sehingga sejak sekarang sekitar selain selama seluruh semua
+sendiri seperti sering serta setelah setiap sudah supaya tanpa tapi telah
+tentang terhadap tersebut tetapi tidak tiga untuk wah yaitu yakni yang
+""".split())
+
+PARTICLE_SUFFIXES = ('pun',)
+POSSESSIVE_SUFFIXES = ('nya',)
+VOWELS = 'aeiou'
+
+# Prefixes in match order, with the suffixes each may combine with (confixes).
+# Without a root-word dictionary only these well-attested pairs are undone.
+PREFIX_RULES = (
+    ('meny', ('kan',)), ('meng', ('kan',)), ('mem', ('kan',)), ('men', ('kan',)), ('me', ('kan',)),
+    ('peny', ('an',)), ('peng', ('an',)), ('pem', ('an',)), ('pen', ('an',)),
+    ('per', ('an', 'kan')), ('pe', ('an',)),
+    ('ber', ()), ('ter', ()), ('di', ('kan',)), ('ke', ('an',)),
+)
+
+# Shortest stem the stemmer will leave behind after removing a suffix / a prefix
+MIN_STEM_LENGTH = 3
+MIN_ROOT_LENGTH = 4
+
+# Number of analyzed articles kept in memory
+ARTICLE_CACHE_SIZE = 4096
+
+
+def normalize(text):
+    """Unicode-normalize, strip diacritics and lowercase"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return unicodedata.normalize('NFC', text).lower()
+
+
+def clean_text(text):
+    """NFKC-normalize and collapse runs of whitespace, keeping paragraph breaks"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', text)
+    lines = [WHITESPACE_RE.sub(' ', line).strip() for line in text.splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def tokenize(text):
+    """Split text into normalized word tokens (no stopword removal or stemming)"""
+    return TOKEN_RE.findall(normalize(text))
+
+
+def split_sentences(text):
+    """Split text into sentences on terminal punctuation and blank lines"""
+    text = clean_text(text)
+    return [sentence.strip() for sentence in SENTENCE_RE.split(text) if sentence and sentence.strip()]
+
+
+def _strip_suffix(word, suffixes):
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def _undo_assimilation(prefix, rest):
+    """Restore the root initial dropped by meN-/peN- (menulis -> tulis, menyapu -> sapu)"""
+    if not rest or rest[0] not in VOWELS:
+        return rest
+    if prefix in ('meny', 'peny'):
+        return 's' + rest
+    if prefix in ('mem', 'pem'):
+        return 'p' + rest
+    if prefix in ('men', 'pen'):
+        return 't' + rest
+    return rest
+
+
+def stem(word):
+    """
+    Light rule-based Indonesian stemmer. Strips -pun and -nya, then one
+    prefix (meN-, peN-, per-, ber-, ter-, di-, ke-) together with the
+    suffix it commonly pairs with (me-...-kan, ke-...-an, peN-...-an, ...).
+    The ke- prefix is only removed as part of the ke-...-an confix.
+    """
+    if len(word) <= MIN_STEM_LENGTH + 1 or not word.isalpha():
+        return word
+    word = _strip_suffix(word, PARTICLE_SUFFIXES)
+    word = _strip_suffix(word, POSSESSIVE_SUFFIXES)
+
+    for prefix, suffixes in PREFIX_RULES:
+        if not word.startswith(prefix) or len(word) - len(prefix) < MIN_STEM_LENGTH:
+            continue
+        stripped = _strip_suffix(word, suffixes)
+        if prefix == 'ke' and stripped == word:
+            continue
+        rest = _undo_assimilation(prefix, stripped[len(prefix):])
+        if len(rest) >= MIN_ROOT_LENGTH:
+            return rest
+    return word
+
+
+def analyze(text, keep_stopwords=False):
+    """Normalize, tokenize, drop stopwords and stem"""
+    return [stem(token) for token in tokenize(text)
+            if keep_stopwords or token not in STOPWORDS]
+
+
+class ArticleAnalysis:
+    """Cached analysis of one article version"""
+
+    __slots__ = ('title_terms', 'sentences', 'sentence_terms')
+
+    def __init__(self, title, content):
+        self.title_terms = analyze(title)
+        self.sentences = split_sentences(content)
+        self.sentence_terms = [analyze(sentence) for sentence in self.sentences]
+
+    @property
+    def body_terms(self):
+        return [term for terms in self.sentence_terms for term in terms]
+
+
+class AnalysisCache:
+    """LRU of ArticleAnalysis keyed on (article_id, updated_at)"""
+
+    def __init__(self, max_entries=ARTICLE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, article_id, updated_at, title, content):
+        """Analysis for this article version, computed at most once"""
+        key = (article_id, updated_at)
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+                return analysis
+
+        analysis = ArticleAnalysis(title, content)
+        with self._lock:
+            self._entries[key] = analysis
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+    def peek(self, article_id, updated_at):
+        """Cached analysis for this article version, or None (never computes)"""
+        with self._lock:
+            return self._entries.get((article_id, updated_at))
+
+    def discard(self, article_id):
+        """Drop every cached version of an article"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == article_id]:
+                del self._entries[key]
+
+
+# Shared per-process cache
+analysis_cache = AnalysisCache()
+
+
+def analyze_article(article_id, updated_at, title, content):
+    """Cached ArticleAnalysis for an article version"""
+    return analysis_cache.get(article_id, updated_at, title, content)
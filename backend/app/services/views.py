@@ -0,0 +1,194 @@
+import atexit
+import math
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, delete, insert, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.models.article import Article
+from app.models.article_view import ArticleView
+
+# Most articles kept in the cached trending list (the endpoint's maximum limit)
+TRENDING_TOP_N = 50
+
+
+def bucket_start(moment):
+    """Start of the hour containing moment"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class ViewCounter:
+    """
+    Per-process write-behind view counters.
+
+    record() only bumps an in-memory counter; a background thread flushes
+    the accumulated counts every VIEW_FLUSH_INTERVAL seconds as one batched
+    upsert into the hourly article_views rollup, so article reads never
+    write to the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()  # (article_id, bucket_start) -> views not yet written
+        self._thread = None
+        self._app = None
+        self._last_prune = None
+
+    def record(self, article_id):
+        """Count one view of an article (no I/O)"""
+        key = (article_id, bucket_start(datetime.utcnow()))
+        with self._lock:
+            self._pending[key] += 1
+        if self._thread is None:
+            self._start()
+
+    def pending(self):
+        with self._lock:
+            return sum(self._pending.values())
+
+    def _start(self):
+        # Started lazily so each gunicorn worker gets its own thread after the fork
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self._flush_at_exit)
+
+    def _run(self):
+        while True:
+            time.sleep(self._app.config['VIEW_FLUSH_INTERVAL'])
+            with self._app.app_context():
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"View counter flush error: {e}")
+                finally:
+                    db.session.remove()
+
+    def _flush_at_exit(self):
+        with self._app.app_context():
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"View counter flush error: {e}")
+
+    def flush(self):
+        """Write pending counts in one batched upsert; returns the number of views written"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        try:
+            # Views of articles deleted since they were counted are dropped
+            existing = set(db.session.execute(
+                select(Article.id).where(Article.id.in_({article_id for article_id, _ in pending}))
+            ).scalars())
+            rows = [{'article_id': article_id, 'bucket_start': start, 'views': views}
+                    for (article_id, start), views in pending.items() if article_id in existing]
+            if rows:
+                _upsert(rows)
+            self._prune()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Keep the counts for the next attempt
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return sum(row['views'] for row in rows)
+
+    def _prune(self):
+        """Drop rollup rows past the retention period (at most once an hour per process)"""
+        hour = bucket_start(datetime.utcnow())
+        if self._last_prune == hour:
+            return
+        cutoff = hour - timedelta(days=current_app.config['VIEW_RETENTION_DAYS'])
+        db.session.execute(delete(ArticleView).where(ArticleView.bucket_start < cutoff))
+        self._last_prune = hour
+
+
+def _upsert(rows):
+    """Add rows to the rollup, adding to the existing count on (article_id, bucket_start) conflicts"""
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        statement = mysql_insert(ArticleView).values(rows)
+        db.session.execute(statement.on_duplicate_key_update(views=ArticleView.views + statement.inserted.views))
+        return
+    if dialect == 'sqlite':
+        statement = sqlite_insert(ArticleView).values(rows)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['article_id', 'bucket_start'],
+            set_={'views': ArticleView.views + statement.excluded.views}
+        ))
+        return
+
+    # Other backends: update existing rows and insert the rest. Should another worker insert
+    # the same row first, the flush fails and its counts are retried as updates next cycle
+    for row in rows:
+        updated = db.session.execute(
+            update(ArticleView)
+            .where(ArticleView.article_id == row['article_id'], ArticleView.bucket_start == row['bucket_start'])
+            .values(views=ArticleView.views + row['views'])
+        ).rowcount
+        if not updated:
+            db.session.execute(insert(ArticleView).values(row))
+
+
+class TrendingCache:
+    """Top TRENDING_TOP_N articles by decayed view score, recomputed at most every TRENDING_CACHE_TTL"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ranked = None
+        self._expires_at = 0.0
+
+    def top(self, limit):
+        """[(article_id, score), ...] best first"""
+        with self._lock:
+            if self._ranked is None or time.monotonic() >= self._expires_at:
+                self._ranked = trending_scores()
+                self._expires_at = time.monotonic() + current_app.config['TRENDING_CACHE_TTL']
+            return self._ranked[:limit]
+
+    def discard(self, article_id):
+        """Drop a deleted article without waiting for the next refresh"""
+        with self._lock:
+            if self._ranked is not None:
+                self._ranked = [item for item in self._ranked if item[0] != article_id]
+
+
+def trending_scores(top_n=TRENDING_TOP_N):
+    """
+    Score articles by views in the last TRENDING_WINDOW_HOURS, each hourly
+    bucket weighted by 0.5 ** (age / TRENDING_HALF_LIFE_HOURS).
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    since = bucket_start(now) - timedelta(hours=config['TRENDING_WINDOW_HOURS'])
+    half_life = config['TRENDING_HALF_LIFE_HOURS']
+
+    scores = Counter()
+    rows = db.session.execute(
+        select(ArticleView.article_id, ArticleView.bucket_start, ArticleView.views)
+        .where(ArticleView.bucket_start >= since)
+    )
+    for article_id, start, views in rows:
+        # Age measured from the middle of the bucket
+        age_hours = max((now - start).total_seconds() / 3600 - 0.5, 0.0)
+        scores[article_id] += views * math.pow(0.5, age_hours / half_life)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+    return [(article_id, round(score, 3)) for article_id, score in ranked[:top_n]]
+
+
+# Shared per-process instances
+view_counter = ViewCounter()
+trending_cache = TrendingCache()
@@ -0,0 +1,37 @@
+import hashlib
+from datetime import timezone
+from flask import request, make_response
+
+
+def make_etag(*parts):
+    """Strong ETag value derived from validator parts (ids, versions, timestamps)"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _http_time(value):
+    """Naive UTC datetime -> aware datetime at HTTP (second) precision"""
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def is_not_modified(etag, last_modified=None):
+    """Check If-None-Match (preferred) or If-Modified-Since against the validators"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return _http_time(last_modified) <= request.if_modified_since
+    return False
+
+
+def with_validators(response, etag, last_modified=None, private=False):
+    """Attach ETag/Last-Modified and ask clients to revalidate before reuse"""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = _http_time(last_modified)
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    response.vary.add('Authorization')
+    return response
+
+
+def not_modified(etag, last_modified=None, private=False):
+    """Empty 304 response carrying the current validators"""
+    return with_validators(make_response('', 304), etag, last_modified, private)
@@ -0,0 +1,26 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(published_date, article_id, direction):
+    """Encode a (published_date, id) keyset position as an opaque cursor"""
+    payload = json.dumps([published_date.isoformat(), article_id, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (published_date, id, direction); raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        published, article_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        published_date = datetime.fromisoformat(published)
+        article_id = int(article_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError('Invalid cursor')
+
+    if direction not in ('next', 'prev'):
+        raise ValueError('Invalid cursor')
+
+    return published_date, article_id, direction
@@ -26,5 +26,51 @@ class Config:
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173').split(',')
     
+    # Search
+    SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH')  # defaults to instance/search_index.pkl
+    SEARCH_INDEX_SYNC_INTERVAL = int(os.getenv('SEARCH_INDEX_SYNC_INTERVAL', 30))  # seconds
+    
+    # Response cache
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    
+    # Near-duplicate detection
+    DUPLICATE_THRESHOLD = float(os.getenv('DUPLICATE_THRESHOLD', 0.8))  # estimated Jaccard similarity
+    DUPLICATE_POLICY = os.getenv('DUPLICATE_POLICY', 'flag')  # 'flag' or 'reject' on article writes
+    
+    # View counters and trending
+    VIEW_FLUSH_INTERVAL = int(os.getenv('VIEW_FLUSH_INTERVAL', 15))  # seconds between batched writes
+    VIEW_RETENTION_DAYS = int(os.getenv('VIEW_RETENTION_DAYS', 30))
+    TRENDING_WINDOW_HOURS = int(os.getenv('TRENDING_WINDOW_HOURS', 72))
+    TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', 12))
+    TRENDING_CACHE_TTL = int(os.getenv('TRENDING_CACHE_TTL', 60))  # seconds
+    
+    # AI summaries
+    SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', 512))  # in-process tier
+    SUMMARY_PREGENERATE = os.getenv('SUMMARY_PREGENERATE', 'true').lower() == 'true'
+    SUMMARY_WORKERS = int(os.getenv('SUMMARY_WORKERS', 2))  # background generations per process
+    SUMMARY_QUEUE_MAX = int(os.getenv('SUMMARY_QUEUE_MAX', 100))  # queued jobs per process
+    SUMMARY_JOB_TIMEOUT = int(os.getenv('SUMMARY_JOB_TIMEOUT', 120))  # seconds before a pending job is ignored
+    SUMMARY_PROMPT_TOKENS = int(os.getenv('SUMMARY_PROMPT_TOKENS', 600))  # article text per prompt; longer articles are excerpted
+    SUMMARY_FALLBACK = os.getenv('SUMMARY_FALLBACK', 'extractive')  # backend answering when Gemini fails ('none' for placeholders)
+    SUMMARY_BATCH_TOKENS = int(os.getenv('SUMMARY_BATCH_TOKENS', 8000))  # estimated prompt tokens per batch call
+    SUMMARY_BATCH_MAX_ITEMS = int(os.getenv('SUMMARY_BATCH_MAX_ITEMS', 10))  # articles per batch call
+    SUMMARY_BATCH_ATTEMPTS = int(os.getenv('SUMMARY_BATCH_ATTEMPTS', 3))  # calls per article before falling back
+    SUMMARY_COALESCE_WAIT = float(os.getenv('SUMMARY_COALESCE_WAIT', 5))  # seconds past GEMINI_DEADLINE to wait on an identical generation before answering 202
+    
+    # Gemini client (per process)
+    GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', 20))  # seconds per attempt
+    GEMINI_DEADLINE = float(os.getenv('GEMINI_DEADLINE', 40))  # seconds per call including retries, well under gunicorn's --timeout
+    GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', 2))
+    GEMINI_RETRY_BUDGET = float(os.getenv('GEMINI_RETRY_BUDGET', 0.1))  # retries earned per call
+    GEMINI_BREAKER_THRESHOLD = float(os.getenv('GEMINI_BREAKER_THRESHOLD', 0.5))  # failure rate that opens the breaker
+    GEMINI_BREAKER_MIN_CALLS = int(os.getenv('GEMINI_BREAKER_MIN_CALLS', 10))  # calls in the window before it can open
+    GEMINI_BREAKER_WINDOW = int(os.getenv('GEMINI_BREAKER_WINDOW', 60))  # seconds of outcomes considered
+    GEMINI_BREAKER_COOLDOWN = int(os.getenv('GEMINI_BREAKER_COOLDOWN', 30))  # seconds failing fast before a probe
+    GEMINI_INPUT_PRICE_PER_M = float(os.getenv('GEMINI_INPUT_PRICE_PER_M', 0.30))  # USD per million prompt tokens
+    GEMINI_OUTPUT_PRICE_PER_M = float(os.getenv('GEMINI_OUTPUT_PRICE_PER_M', 2.50))  # USD per million response tokens
+    LLM_TELEMETRY_WINDOW = int(os.getenv('LLM_TELEMETRY_WINDOW', 3600))  # seconds of rolling summary telemetry
+    
     # Application
     DEBUG = os.getenv('FLASK_ENV') == 'development'
@@ -1,5 +1,13 @@
+import time
+import click
 from app import create_app, db
-from app.models import User, Article, Category, Tag, Bookmark, AdminLog
+from app.models import User, Article, Category, Tag, Bookmark, AdminLog, CollectionVersion, ArticleLshBucket, ArticleView
+from app.services.search import search_index, snapshot_path
+from app.services.article_counts import recount_articles
+from app.services.text_analysis import ArticleAnalysis, tokenize
+from app.services.duplicates import index_signatures, duplicate_clusters
+from app.services.ai_summary import DEFAULT_FILTERS, SUMMARY_LENGTHS
+from app.services.summary_batch import summarize_batch
 
 app = create_app()
 
@@ -14,9 +22,90 @@ def make_shell_context():
         'Category': Category,
         'Tag': Tag,
         'Bookmark': Bookmark,
-        'AdminLog': AdminLog
+        'AdminLog': AdminLog,
+        'CollectionVersion': CollectionVersion,
+        'ArticleLshBucket': ArticleLshBucket,
+        'ArticleView': ArticleView
     }
 
 
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Rebuild the full-text search index from the database"""
+    search_index.build()
+    path = snapshot_path()
+    search_index.save(path)
+    print(f"Indexed {len(search_index.doc_len)} articles, "
+          f"{len(search_index.postings)} terms -> {path}")
+
+
+@app.cli.command('repair-article-counts')
+def repair_article_counts():
+    """Recompute category and tag article counts from the database"""
+    recount_articles()
+    CollectionVersion.bump('articles')
+    db.session.commit()
+    print(f"Recounted {Category.query.count()} categories and {Tag.query.count()} tags")
+
+
+@app.cli.command('index-duplicates')
+@click.option('--all', 'rebuild_all', is_flag=True, help='Recompute every signature, not only missing ones')
+def index_duplicates(rebuild_all):
+    """Store MinHash signatures and LSH buckets, then report near-duplicate clusters"""
+    indexed = index_signatures(only_missing=not rebuild_all)
+    db.session.commit()
+    clusters = duplicate_clusters()
+    print(f"Indexed {indexed} articles; {len(clusters)} near-duplicate clusters")
+    for cluster in clusters:
+        print('  ' + ', '.join(f"#{article['id']} {article['title'][:40]}" for article in cluster['articles']))
+
+
+@app.cli.command('benchmark-analyzer')
+@click.option('--repeat', default=3, help='Number of timed passes over the corpus')
+def benchmark_analyzer(repeat):
+    """Measure text-analysis throughput (input tokens per second) over all articles"""
+    rows = db.session.query(Article.title, Article.content).all()
+    tokens = sum(len(tokenize(title)) + len(tokenize(content)) for title, content in rows)
+    
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for title, content in rows:
+            ArticleAnalysis(title, content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    
+    rate = tokens / best if best else 0
+    print(f"{len(rows)} articles, {tokens} tokens: best of {repeat} = {best:.3f}s ({rate:,.0f} tokens/s)")
+
+
+@app.cli.command('summarize-backfill')
+@click.option('--length', default='medium', type=click.Choice(SUMMARY_LENGTHS), help='Summary length to generate')
+@click.option('--limit', default=None, type=int, help='Only the most recent N articles')
+@click.option('--chunk', default=200, help='Articles loaded from the database at a time')
+def summarize_backfill(length, limit, chunk):
+    """Generate the default summary of every article lacking one, several articles per model call"""
+    query = db.session.query(Article.id).order_by(Article.published_date.desc())
+    if limit:
+        query = query.limit(limit)
+    article_ids = [row.id for row in query]
+    
+    counts = {}
+    start = time.perf_counter()
+    for offset in range(0, len(article_ids), chunk):
+        ids = article_ids[offset:offset + chunk]
+        rows = db.session.query(Article.id, Article.content).filter(Article.id.in_(ids)).all()
+        results = summarize_batch(rows, list(DEFAULT_FILTERS), length)
+        for _, status in results.values():
+            counts[status] = counts.get(status, 0) + 1
+        print(f"  {min(offset + chunk, len(article_ids))}/{len(article_ids)} articles")
+    elapsed = time.perf_counter() - start
+    
+    generated = counts.get('generated', 0)
+    rate = generated / elapsed * 60 if elapsed else 0
+    print(f"{generated} generated, {counts.get('cached', 0)} already cached, "
+          f"{counts.get('failed', 0)} failed in {elapsed:.1f}s ({rate:,.0f} articles/min)")
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
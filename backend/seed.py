@@ -2,6 +2,8 @@
 
 from app import create_app, db
 from app.models import User, Article, Category, Tag, Bookmark
+from app.services.article_counts import recount_articles
+from app.services.duplicates import index_signatures
 from datetime import datetime, timedelta
 import random
 
@@ -543,6 +545,8 @@ Bagi mahasiswa, program ini menjadi wadah untuk mengasah soft skills seperti kep
             
             db.session.add(article)
         
+        recount_articles()
+        index_signatures()
         db.session.commit()
         
         # Create sample bookmarks
@@ -3,6 +3,9 @@ from app.models.category import Category
 from app.models.article import Article
 from app.models.tag import Tag
 from app.models.user import User
+from app.models.collection_version import CollectionVersion
+from app.services.article_counts import recount_articles
+from app.services.duplicates import signature, find_duplicates, store_signature, index_signatures
 from datetime import datetime, timedelta
 import random
 
@@ -96,6 +99,9 @@ def seed_cyber_expansion():
 
         print(f"Adding {len(articles_data)} cyber security articles...")
 
+        # Existing rows need signatures before new ones can be checked against them
+        index_signatures()
+
         for article_data in articles_data:
             # Check if article exists
             existing_article = Article.query.filter_by(title=article_data['title']).first()
@@ -103,6 +109,13 @@ def seed_cyber_expansion():
                 print(f"Skipping existing article: {article_data['title']}")
                 continue
 
+            # Skip re-edited copies of stories that are already stored
+            article_signature = signature(article_data['title'], article_data['content'])
+            similar = find_duplicates(article_signature)
+            if similar:
+                print(f"Skipping near-duplicate of #{similar[0]['id']}: {article_data['title']}")
+                continue
+
             # Get tags
             article_tags = []
             for tag_name in article_data['tags']:
@@ -126,8 +139,13 @@ def seed_cyber_expansion():
             article.tags = article_tags
             
             db.session.add(article)
+            db.session.flush()
+            store_signature(article.id, article_signature)
             print(f"Added article: {article.title}")
 
+        # Let cached counts and HTTP validators see the new rows
+        recount_articles()
+        CollectionVersion.bump('articles', 'categories', 'tags')
         db.session.commit()
         print("Seeding completed successfully!")
 
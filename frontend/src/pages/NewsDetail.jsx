@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
-import api from '../utils/api';
+import api, { postEventStream } from '../utils/api';
 import { toast } from 'react-toastify';
 import { format } from 'date-fns';
 import { id as idLocale } from 'date-fns/locale/id';
@@ -104,11 +104,49 @@ const NewsDetail = () => {
         }
 
         setSummaryLoading(true);
+        setSummary('');
         try {
-            const response = await api.post('/summarize', {
+            // Sections arrive one by one, cached ones first
+            let pending = false;
+            try {
+                await postEventStream('/summarize/stream', {
+                    article_id: parseInt(articleId),
+                    filters: selectedFilters
+                }, (event, data) => {
+                    if (event === 'section') {
+                        setSummary(prev => ({ ...(typeof prev === 'object' ? prev : {}), [data.filter]: data.text }));
+                    } else if (event === 'pending') {
+                        pending = true;
+                    } else if (event === 'error') {
+                        throw new Error(data.error);
+                    }
+                });
+            } catch (streamError) {
+                console.error('Summary stream failed, falling back:', streamError);
+                pending = true;
+            }
+            if (!pending) {
+                return;
+            }
+
+            let response = await api.post('/summarize', {
                 article_id: parseInt(articleId),
                 filters: selectedFilters
             });
+
+            // 202 means the summary is still being generated in the background
+            for (let attempt = 0; response.status === 202 && attempt < 15; attempt++) {
+                const retryAfter = (response.data.retry_after || 2) * 1000;
+                await new Promise(resolve => setTimeout(resolve, retryAfter));
+                response = await api.post('/summarize', {
+                    article_id: parseInt(articleId),
+                    filters: selectedFilters
+                });
+            }
+            if (response.status === 202) {
+                throw new Error('Summary is still pending');
+            }
+
             // Backend returns the summary object directly
             setSummary(response.data);
         } catch (error) {